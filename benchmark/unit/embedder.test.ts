@@ -0,0 +1,50 @@
+/**
+ * VoyageEmbedder 限流与重试单元测试
+ *
+ * 替换内部 Voyage client，不发出网络请求。
+ */
+
+import { describe, it, expect, vi } from 'vitest';
+import { RateLimiter, RateLimitError, VoyageEmbedder, Logger, LogLevel } from '@gc-doc/shared';
+
+const EMBEDDING_DIM = 2;
+
+function createEmbedder(rateLimiter: RateLimiter, maxRetries: number) {
+	const embedder = new VoyageEmbedder({
+		apiKey: 'test',
+		model: 'voyage-test',
+		embeddingDim: EMBEDDING_DIM,
+		batchSize: 1,
+		maxRetries,
+		retryDelay: 1,
+		concurrency: 4,
+		rateLimiter,
+		logger: new Logger({ level: LogLevel.ERROR }),
+	});
+	const embed = vi.fn(async ({ input }: { input: string[] }) => ({
+		data: input.map(() => ({ embedding: new Array(EMBEDDING_DIM).fill(0) })),
+	}));
+	(embedder as unknown as { client: { embed: typeof embed } }).client = { embed };
+	return { embedder, embed };
+}
+
+describe('VoyageEmbedder rate limiting', () => {
+	it('waits for the local window instead of spending retries on it', async () => {
+		// 每个窗口只放行 1 个请求；4 个 worker 争抢，且不允许重试
+		const rateLimiter = new RateLimiter({ requestsPerMinute: 1, tokensPerMinute: 1_000_000, windowMs: 100 });
+		const { embedder, embed } = createEmbedder(rateLimiter, 1);
+
+		const results = await embedder.embedBatch(['a', 'b', 'c']);
+
+		expect(results.map(r => r.text)).toEqual(['a', 'b', 'c']);
+		expect(embed).toHaveBeenCalledTimes(3);
+	});
+
+	it('fails fast when a single batch exceeds the TPM limit', async () => {
+		const rateLimiter = new RateLimiter({ requestsPerMinute: 100, tokensPerMinute: 1 });
+		const { embedder, embed } = createEmbedder(rateLimiter, 3);
+
+		await expect(embedder.embedBatch(['a batch well over one token'])).rejects.toBeInstanceOf(RateLimitError);
+		expect(embed).toHaveBeenCalledTimes(0);
+	});
+});
@@ -0,0 +1,124 @@
+/**
+ * RagIndexer 断点续传单元测试
+ *
+ * Qdrant 与 embedder 用假对象代替；checkpoint 写在临时目录。
+ */
+
+import { describe, it, expect, vi, beforeEach, afterEach } from 'vitest';
+import { promises as fs } from 'node:fs';
+import { tmpdir } from 'node:os';
+import { join } from 'node:path';
+import type { QdrantClient, UpsertPoint, VoyageEmbedder } from '@gc-doc/shared';
+import { RagIndexer } from '../../src/embed/src/indexer.js';
+import type { Chunk } from '../../src/embed/src/document/types.js';
+
+const CHUNK_IDS = ['doc_chunk0', 'doc_chunk1', 'doc_chunk2', 'doc_chunk3', 'doc_chunk4'];
+
+function makeChunks(): Chunk[] {
+	return CHUNK_IDS.map((id, i) => ({
+		id,
+		doc_id: 'doc',
+		chunk_index: i,
+		content: `content ${i}`,
+		metadata: { relative_path: 'doc.md', chunk_index: i },
+	}));
+}
+
+/** 只能遍历一次的流 */
+async function* oneShot(chunks: Chunk[]): AsyncGenerator<Chunk> {
+	yield* chunks;
+}
+
+let dir: string;
+let checkpointPath: string;
+
+function createIndexer() {
+	const written: string[] = [];
+	const qdrant = {
+		upsert: vi.fn(async (_collection: string, points: UpsertPoint[]) => {
+			written.push(...points.map(p => String(p.id)));
+		}),
+		retrievePayloads: vi.fn(async () => []),
+	};
+	const embedder = {
+		getModel: () => 'voyage-test',
+		getEmbeddingDim: () => 2,
+		embedBatch: vi.fn(async (texts: string[]) => texts.map(text => ({ text, embedding: [0, 0], tokens: 1 }))),
+	};
+	const indexer = new RagIndexer({
+		qdrant: qdrant as unknown as QdrantClient,
+		collection: 'test',
+		embedder: embedder as unknown as VoyageEmbedder,
+		batchSize: 2,
+		checkpointPath,
+	});
+	return { indexer, qdrant, written };
+}
+
+async function writeCheckpoint(lastProcessedId: string): Promise<void> {
+	await fs.writeFile(checkpointPath, JSON.stringify({ lastProcessedId, timestamp: Date.now() }));
+}
+
+async function checkpointExists(): Promise<boolean> {
+	return fs.access(checkpointPath).then(() => true, () => false);
+}
+
+beforeEach(async () => {
+	dir = await fs.mkdtemp(join(tmpdir(), 'indexer-test-'));
+	checkpointPath = join(dir, 'checkpoint.json');
+});
+
+afterEach(async () => {
+	await fs.rm(dir, { recursive: true, force: true });
+});
+
+describe('RagIndexer checkpoint', () => {
+	it('resumes after the checkpointed chunk', async () => {
+		await writeCheckpoint('doc_chunk1');
+		const { indexer, written } = createIndexer();
+
+		const stats = await indexer.indexChunks(makeChunks());
+
+		expect(written).toEqual(['doc_chunk2', 'doc_chunk3', 'doc_chunk4']);
+		expect(stats.skippedCount).toBe(2);
+		expect(stats.successCount).toBe(3);
+		expect(await checkpointExists()).toBe(false);
+	});
+
+	describe('stale checkpoint', () => {
+		it('re-indexes everything from a factory source', async () => {
+			await writeCheckpoint('removed_chunk');
+			const { indexer, written } = createIndexer();
+
+			const stats = await indexer.indexChunks(() => oneShot(makeChunks()));
+
+			expect(written).toEqual(CHUNK_IDS);
+			expect(stats.totalChunks).toBe(CHUNK_IDS.length);
+			expect(stats.skippedCount).toBe(0);
+			expect(stats.successCount).toBe(CHUNK_IDS.length);
+			expect(await checkpointExists()).toBe(false);
+		});
+
+		it('re-iterates an array source', async () => {
+			await writeCheckpoint('removed_chunk');
+			const { indexer, written } = createIndexer();
+
+			const stats = await indexer.indexChunks(makeChunks());
+
+			expect(written).toEqual(CHUNK_IDS);
+			expect(stats.skippedCount).toBe(0);
+			expect(stats.successCount).toBe(CHUNK_IDS.length);
+		});
+
+		it('throws instead of reporting success for a one-shot stream', async () => {
+			await writeCheckpoint('removed_chunk');
+			const { indexer, qdrant } = createIndexer();
+
+			await expect(indexer.indexChunks(oneShot(makeChunks()))).rejects.toThrow('removed_chunk');
+
+			expect(qdrant.upsert).toHaveBeenCalledTimes(0);
+			// 失效的 checkpoint 已清除，下次运行从头索引
+			expect(await checkpointExists()).toBe(false);
+		});
+	});
+});
@@ -0,0 +1,87 @@
+/**
+ * 语言检测单元测试
+ *
+ * 固定按文字范围判断的路由规则：假名 → ja；汉字 × 3 ≥ 拉丁字母 → zh；拉丁字母 → en。
+ * 中英混写的代码类查询是阈值起作用的地方。
+ */
+
+import { describe, it, expect } from 'vitest';
+import { detectLanguage, detectBatchLanguage } from '../../src/mcp/src/rag/language-detect.js';
+
+describe('detectLanguage', () => {
+	describe('zh', () => {
+		it('detects pure Chinese', () => {
+			expect(detectLanguage('如何设置单元格的背景颜色')).toBe('zh');
+		});
+
+		it('detects short Chinese queries', () => {
+			expect(detectLanguage('数据绑定')).toBe('zh');
+		});
+
+		it('keeps Chinese with a short API identifier as zh', () => {
+			// 4 个汉字 × 3 = 12 ≥ 8 个字母
+			expect(detectLanguage('如何使用 setValue')).toBe('zh');
+		});
+
+		it('keeps Chinese with several API identifiers as zh while han dominates', () => {
+			// 10 个汉字 × 3 = 30 ≥ 24 个字母
+			expect(detectLanguage('怎样调用 setValue 和 getValue 设置单元格 Workbook')).toBe('zh');
+		});
+
+		it('treats han × 3 == latin as zh at the threshold', () => {
+			// 1 个汉字 × 3 = 3 = 3 个字母
+			expect(detectLanguage('用 abc')).toBe('zh');
+			expect(detectLanguage('用 abcd')).toBe('en');
+		});
+	});
+
+	describe('en', () => {
+		it('detects pure English', () => {
+			expect(detectLanguage('How to bind data to a worksheet')).toBe('en');
+		});
+
+		it('routes long API identifiers with a stray Chinese word to en', () => {
+			// 2 个汉字 × 3 = 6 < 31 个字母
+			expect(detectLanguage('GC.Spread.Sheets.Worksheet.setValue 方法')).toBe('en');
+		});
+
+		it('detects code-only queries as en', () => {
+			expect(detectLanguage('sheet.getRange(0, 0, 3, 3).backColor("red")')).toBe('en');
+		});
+	});
+
+	describe('ja', () => {
+		it('detects Japanese with kanji and kana', () => {
+			expect(detectLanguage('セルの書式を設定する方法')).toBe('ja');
+		});
+
+		it('detects kanji-heavy Japanese with a single kana as ja', () => {
+			expect(detectLanguage('数式の計算')).toBe('ja');
+		});
+
+		it('detects Japanese mixed with API identifiers as ja', () => {
+			expect(detectLanguage('setValue メソッドの使い方')).toBe('ja');
+		});
+
+		it('detects halfwidth katakana as ja', () => {
+			expect(detectLanguage('ｾﾙ setValue')).toBe('ja');
+		});
+	});
+
+	describe('fallback', () => {
+		it('returns fallback for empty input', () => {
+			expect(detectLanguage('')).toBe('en');
+			expect(detectLanguage('   ', 'zh')).toBe('zh');
+		});
+
+		it('returns fallback when no letters or CJK characters are present', () => {
+			expect(detectLanguage('123 + 456 = ?', 'ja')).toBe('ja');
+		});
+	});
+});
+
+describe('detectBatchLanguage', () => {
+	it('returns the most frequent language', () => {
+		expect(detectBatchLanguage(['数据绑定', '单元格样式', 'setValue usage'])).toBe('zh');
+	});
+});
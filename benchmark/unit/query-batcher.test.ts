@@ -0,0 +1,141 @@
+/**
+ * 查询 embedding 合并器单元测试
+ *
+ * 用假 embedder 记录每次 embedBatch 调用，由测试手动决定何时返回。
+ */
+
+import { describe, it, expect } from 'vitest';
+import type { EmbedResult, VoyageEmbedder } from '@gc-doc/shared';
+import { QueryEmbeddingBatcher } from '../../src/mcp/src/rag/query-batcher.js';
+
+interface PendingCall {
+	texts: string[];
+	resolve: (results: EmbedResult[]) => void;
+	reject: (error: unknown) => void;
+}
+
+function createFakeEmbedder() {
+	const calls: PendingCall[] = [];
+	const embedder = {
+		embedBatch: (texts: string[]) => new Promise<EmbedResult[]>((resolve, reject) => {
+			calls.push({ texts, resolve, reject });
+		}),
+	};
+	return { embedder: embedder as unknown as VoyageEmbedder, calls };
+}
+
+/** 以文本长度作为向量，便于断言 */
+function answer(call: PendingCall): void {
+	call.resolve(call.texts.map(text => ({ text, embedding: [text.length], tokens: 1 })));
+}
+
+/** 等待已完成 Promise 的回调执行完 */
+function settle(): Promise<void> {
+	return new Promise(resolve => setTimeout(resolve, 0));
+}
+
+describe('QueryEmbeddingBatcher', () => {
+	describe('batching', () => {
+		it('sends a query immediately when no request is in flight', () => {
+			const { embedder, calls } = createFakeEmbedder();
+			const batcher = new QueryEmbeddingBatcher(embedder);
+
+			void batcher.embed('setValue');
+
+			expect(calls).toHaveLength(1);
+			expect(calls[0].texts).toEqual(['setValue']);
+		});
+
+		it('coalesces queries that arrive while a request is in flight', async () => {
+			const { embedder, calls } = createFakeEmbedder();
+			const batcher = new QueryEmbeddingBatcher(embedder);
+
+			const first = batcher.embed('a');
+			const second = batcher.embed('bb');
+			const third = batcher.embed('ccc');
+			expect(calls).toHaveLength(1);
+
+			answer(calls[0]);
+			await expect(first).resolves.toEqual([1]);
+			await settle();
+
+			expect(calls).toHaveLength(2);
+			expect(calls[1].texts).toEqual(['bb', 'ccc']);
+
+			answer(calls[1]);
+			await expect(second).resolves.toEqual([2]);
+			await expect(third).resolves.toEqual([3]);
+		});
+
+		it('sends a full batch without waiting for the in-flight request', () => {
+			const { embedder, calls } = createFakeEmbedder();
+			const batcher = new QueryEmbeddingBatcher(embedder, 2);
+
+			void batcher.embed('a');
+			void batcher.embed('b');
+			void batcher.embed('c');
+
+			expect(calls.map(c => c.texts)).toEqual([['a'], ['b', 'c']]);
+		});
+
+		it('rejects every query of a failed batch', async () => {
+			const { embedder, calls } = createFakeEmbedder();
+			const batcher = new QueryEmbeddingBatcher(embedder);
+
+			const first = batcher.embed('a');
+			const second = batcher.embed('b');
+			answer(calls[0]);
+			await first;
+			await settle();
+
+			calls[1].reject(new Error('boom'));
+			await expect(second).rejects.toThrow('boom');
+		});
+	});
+
+	describe('cache', () => {
+		it('serves a repeated query from the cache without calling the embedder', async () => {
+			const { embedder, calls } = createFakeEmbedder();
+			const batcher = new QueryEmbeddingBatcher(embedder);
+
+			const first = batcher.embed('setValue');
+			answer(calls[0]);
+			await expect(first).resolves.toEqual([8]);
+			await settle();
+
+			await expect(batcher.embed('setValue')).resolves.toEqual([8]);
+			expect(calls).toHaveLength(1);
+		});
+
+		it('joins an identical query that is still in flight', async () => {
+			const { embedder, calls } = createFakeEmbedder();
+			const batcher = new QueryEmbeddingBatcher(embedder);
+
+			const first = batcher.embed('setValue');
+			const second = batcher.embed('setValue');
+
+			expect(second).toBe(first);
+			expect(calls).toHaveLength(1);
+
+			answer(calls[0]);
+			await expect(second).resolves.toEqual([8]);
+		});
+
+		it('evicts a rejected query so the next call retries', async () => {
+			const { embedder, calls } = createFakeEmbedder();
+			const batcher = new QueryEmbeddingBatcher(embedder);
+
+			const failed = batcher.embed('setValue');
+			calls[0].reject(new Error('rate limited'));
+			await expect(failed).rejects.toThrow('rate limited');
+			await settle();
+
+			const retried = batcher.embed('setValue');
+			expect(retried).not.toBe(failed);
+			expect(calls).toHaveLength(2);
+
+			answer(calls[1]);
+			await expect(retried).resolves.toEqual([8]);
+		});
+	});
+});
@@ -0,0 +1,106 @@
+/**
+ * RagSearcher 结果缓存单元测试
+ *
+ * Qdrant、embedder 用假对象代替，rerank 请求通过替换全局 fetch 拦截。
+ */
+
+import { describe, it, expect, vi, afterEach } from 'vitest';
+import type { QdrantClient, QdrantSearchResult, VoyageEmbedder } from '@gc-doc/shared';
+import { RagSearcher } from '../../src/mcp/src/rag/searcher.js';
+
+const CANDIDATES: QdrantSearchResult[] = [
+	{ id: 1, score: 0.5, payload: { chunk_id: 'a_chunk0', doc_id: 'a', content: 'alpha', metadata: { category: 'api' } } },
+	{ id: 2, score: 0.4, payload: { chunk_id: 'b_chunk0', doc_id: 'b', content: 'beta', metadata: { category: 'doc' } } },
+];
+
+function rerankResponse(ok: boolean) {
+	return {
+		ok,
+		status: ok ? 200 : 500,
+		text: async () => 'server error',
+		json: async () => ({ data: [{ index: 1, relevance_score: 0.9 }, { index: 0, relevance_score: 0.8 }] }),
+	};
+}
+
+function createSearcher(rerankOk = true) {
+	const qdrant = {
+		queryHybrid: vi.fn(async () => CANDIDATES),
+		queryDense: vi.fn(async () => CANDIDATES),
+	};
+	const embedder = {
+		embed: vi.fn(async () => [0, 0]),
+	};
+	const fetchMock = vi.fn(async () => rerankResponse(rerankOk));
+	vi.stubGlobal('fetch', fetchMock);
+
+	const searcher = new RagSearcher({
+		qdrant: qdrant as unknown as QdrantClient,
+		collection: 'test',
+		embedder: embedder as unknown as VoyageEmbedder,
+		docLanguage: 'en',
+		rerankModel: 'rerank-test',
+		voyageApiKey: 'test',
+		prefetchLimit: 10,
+		rerankTopK: 5,
+		denseScoreThreshold: 0,
+	});
+	return { searcher, qdrant, embedder, fetchMock };
+}
+
+afterEach(() => {
+	vi.unstubAllGlobals();
+});
+
+describe('RagSearcher result cache', () => {
+	it('serves a repeated query without calling embed, Qdrant or rerank', async () => {
+		const { searcher, qdrant, embedder, fetchMock } = createSearcher();
+
+		const first = await searcher.search('bind data', 5, true);
+		const second = await searcher.search('bind data', 5, true);
+
+		expect(second.results).toEqual(first.results);
+		expect(second.rerank_used).toBe(true);
+		expect(embedder.embed).toHaveBeenCalledTimes(1);
+		expect(qdrant.queryHybrid).toHaveBeenCalledTimes(1);
+		expect(fetchMock).toHaveBeenCalledTimes(1);
+	});
+
+	it('keys the cache by limit and rerank flag', async () => {
+		const { searcher, embedder } = createSearcher();
+
+		await searcher.search('bind data', 5, true);
+		await searcher.search('bind data', 1, true);
+		await searcher.search('bind data', 5, false);
+
+		expect(embedder.embed).toHaveBeenCalledTimes(3);
+	});
+
+	it('is not affected by callers mutating a returned response', async () => {
+		const { searcher } = createSearcher();
+
+		const first = await searcher.search('bind data', 5, true);
+		const expected = structuredClone(first.results);
+		first.results[0].content = 'mutated';
+		first.results[0].metadata.category = 'mutated';
+		first.results.pop();
+
+		const second = await searcher.search('bind data', 5, true);
+		expect(second.results).toEqual(expected);
+
+		second.results[0].content = 'mutated again';
+		const third = await searcher.search('bind data', 5, true);
+		expect(third.results).toEqual(expected);
+	});
+
+	it('does not cache a response whose rerank fell back', async () => {
+		const { searcher, qdrant, embedder, fetchMock } = createSearcher(false);
+
+		const first = await searcher.search('bind data', 5, true);
+		expect(first.rerank_used).toBe(false);
+
+		await searcher.search('bind data', 5, true);
+		expect(embedder.embed).toHaveBeenCalledTimes(2);
+		expect(qdrant.queryHybrid).toHaveBeenCalledTimes(2);
+		expect(fetchMock).toHaveBeenCalledTimes(2);
+	});
+});
@@ -1,9 +1,16 @@
+import { fileURLToPath } from 'node:url';
 import { defineConfig } from 'vitest/config';
 
 export default defineConfig({
+	resolve: {
+		alias: {
+			// 单元测试直接引用源码，无需先 build shared
+			'@gc-doc/shared': fileURLToPath(new URL('../src/shared/src/index.ts', import.meta.url)),
+		},
+	},
 	test: {
 		testTimeout: 30_000,
 		hookTimeout: 15_000,
-		include: ['protocol/**/*.test.ts'],
+		include: ['protocol/**/*.test.ts', 'unit/**/*.test.ts'],
 	},
 });
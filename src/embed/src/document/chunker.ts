@@ -8,19 +8,23 @@ import { MarkdownChunker } from './chunkers/markdown.js';
 import { JavaDocChunker } from './chunkers/javadoc.js';
 import { TypeDocChunker } from './chunkers/typedoc.js';
 
+type ChunkerClass = new (options: ChunkerOptions) => BaseChunker;
+
+/** chunker 类型 → 实现类（模块级查找表） */
+const CHUNKERS: Record<ChunkerType, ChunkerClass> = {
+	markdown: MarkdownChunker,
+	javadoc: JavaDocChunker,
+	typedoc: TypeDocChunker,
+};
+
+const AVAILABLE_CHUNKERS = Object.keys(CHUNKERS).join(', ');
+
 export function createChunker(type: ChunkerType, options: ChunkerOptions): BaseChunker {
-	switch (type) {
-		case 'markdown':
-			return new MarkdownChunker(options);
-		case 'javadoc':
-			return new JavaDocChunker(options);
-		case 'typedoc':
-			return new TypeDocChunker(options);
-		default: {
-			const _exhaustive: never = type;
-			throw new Error(`Unknown chunker type: ${_exhaustive}`);
-		}
+	const ChunkerImpl = CHUNKERS[type] as ChunkerClass | undefined;
+	if (!ChunkerImpl) {
+		throw new Error(`Unknown chunker type: ${type}. Available: ${AVAILABLE_CHUNKERS}`);
 	}
+	return new ChunkerImpl(options);
 }
 
 export { BaseChunker } from './chunkers/base.js';
@@ -11,6 +11,26 @@ const CODE_BLOCK_SIZE_TOLERANCE = 1.5;
 /** 代码块超过此倍数时强制切分 */
 const CODE_BLOCK_SPLIT_THRESHOLD = 3;
 
+/** Markdown 代码块 fence */
+const CODE_FENCE = '```';
+
+/**
+ * 断点候选：连续换行 / 中文句号 / 句末英文句号（后跟空白或 EOF，排除 URL 内的点）
+ */
+const BREAK_POINT_REGEX = /\n+|\u3002|\.(?!\S)/g;
+
+/** header 正则缓存（按 levelPattern），避免每次切分重新编译 */
+const headerRegexCache = new Map<string, RegExp>();
+
+function getHeaderRegex(levelPattern: string): RegExp {
+	let regex = headerRegexCache.get(levelPattern);
+	if (!regex) {
+		regex = new RegExp(`^${levelPattern}\\s+.+$`, 'gm');
+		headerRegexCache.set(levelPattern, regex);
+	}
+	return regex;
+}
+
 export abstract class BaseChunker {
 	protected readonly chunkSize: number;
 	protected readonly minChunkSize: number;
@@ -27,6 +47,9 @@ export abstract class BaseChunker {
 
 	/**
 	 * 创建 Chunk 对象（消除子类重复代码）
+	 *
+	 * 后续回填的 metadata 字段在此预先声明，使所有 chunk 共享同一对象形状，
+	 * 避免逐个追加属性导致的 hidden class 迁移（undefined 字段不会写入 JSON payload）
 	 */
 	protected createChunk(
 		doc: Document,
@@ -41,35 +64,146 @@ export abstract class BaseChunker {
 			metadata: {
 				...doc.metadata,
 				chunk_index: chunkIndex,
+				total_chunks: undefined,
+				section_path: undefined,
+				doc_toc: undefined,
 			},
 		};
 	}
 
+	/**
+	 * 单文档分块，回填 total_chunks 和 doc_toc
+	 */
+	public chunkWithContext(doc: Document): Chunk[] {
+		const docChunks: Chunk[] = [];
+		const toc = this.extractToc(doc.content);
+
+		for (const chunk of this.chunkDocument(doc)) {
+			chunk.metadata.doc_toc = toc;
+			docChunks.push(chunk);
+		}
+
+		const total = docChunks.length;
+		for (const chunk of docChunks) {
+			chunk.metadata.total_chunks = total;
+		}
+
+		return docChunks;
+	}
+
+	/**
+	 * 流式批量分块：逐文档产出 chunk，同一时刻只持有当前文档的 chunks
+	 */
+	public *iterChunks(docs: Iterable<Document>): Generator<Chunk> {
+		for (const doc of docs) {
+			yield* this.chunkWithContext(doc);
+		}
+	}
+
+	/**
+	 * 异步流式分块：文档边加载边分块（配合 DocumentLoader.loadDirectory）
+	 */
+	public async *iterChunksAsync(docs: AsyncIterable<Document>): AsyncGenerator<Chunk> {
+		for await (const doc of docs) {
+			yield* this.chunkWithContext(doc);
+		}
+	}
+
 	/**
 	 * Batch chunk documents
-	 * 回填 total_chunks 和 doc_toc
+	 *
+	 * @deprecated 会物化全部 chunks，使用 iterChunks() 流式消费
 	 */
 	public chunkDocuments(docs: Document[]): Chunk[] {
-		const allChunks: Chunk[] = [];
+		return Array.from(this.iterChunks(docs));
+	}
 
-		for (const doc of docs) {
-			const docChunks: Chunk[] = [];
-			const toc = this.extractToc(doc.content);
+	/**
+	 * 通用 Markdown 策略（MarkdownChunker / TypeDocChunker docs 共用）：
+	 * 小文件整体输出 → h2 主切 → h2 section 仍然太大则 h3 二次切 → splitProtected + header 上下文
+	 */
+	protected *chunkByHeaderLevels(doc: Document): Generator<Chunk> {
+		// 小文件直接输出
+		if (doc.content.length <= this.chunkSize) {
+			if (doc.content.trim().length >= this.minChunkSize) {
+				yield this.createChunk(doc, 0, doc.content);
+			}
+			return;
+		}
 
-			for (const chunk of this.chunkDocument(doc)) {
-				chunk.metadata.doc_toc = toc;
-				docChunks.push(chunk);
+		// 按 h2 切分（主级别）
+		const sections = this.splitByHeaders(doc.content, '#{2}');
+
+		let chunkIndex = 0;
+		for (const section of sections) {
+			const h2 = this.extractHeaderText(section);
+
+			if (section.length <= this.chunkSize) {
+				if (section.trim().length >= this.minChunkSize) {
+					const chunk = this.createChunk(doc, chunkIndex, section);
+					if (h2) chunk.metadata.section_path = [h2];
+					yield chunk;
+					chunkIndex++;
+				}
+				continue;
 			}
 
-			const total = docChunks.length;
-			for (const chunk of docChunks) {
-				chunk.metadata.total_chunks = total;
+			// h2 section 仍然太大 → 按 h3 二次切分
+			const subSections = this.splitByHeaders(section, '#{3}');
+			const sectionHeader = this.extractHeader(section);
+
+			for (const sub of subSections) {
+				const h3 = this.extractHeaderText(sub);
+				const path = [h2, h3].filter(Boolean) as string[];
+				const textChunks = this.splitProtected(sub);
+
+				for (let i = 0; i < textChunks.length; i++) {
+					let text = textChunks[i];
+					if (text.trim().length < this.minChunkSize) continue;
+					// 非首块且缺少 header → 补上 section header
+					if (i > 0 && sectionHeader && !text.startsWith('#')) {
+						text = sectionHeader + '\n\n' + text;
+					}
+					const chunk = this.createChunk(doc, chunkIndex, text);
+					if (path.length > 0) chunk.metadata.section_path = path;
+					yield chunk;
+					chunkIndex++;
+				}
 			}
+		}
+	}
 
-			allChunks.push(...docChunks);
+	/**
+	 * Demo 文档策略（TypeDocChunker / JavaDocChunker 共用）：
+	 * 小文件整体输出，大文件走 splitProtected（含代码块切分），续块补标题 header
+	 */
+	protected *chunkDemo(doc: Document): Generator<Chunk> {
+		const title = this.extractHeaderText(doc.content);
+		// 同一文档的所有 chunk 共享同一个 section_path 数组
+		const sectionPath = title ? [title] : undefined;
+
+		if (doc.content.length <= this.chunkSize) {
+			const chunk = this.createChunk(doc, 0, doc.content);
+			if (sectionPath) chunk.metadata.section_path = sectionPath;
+			yield chunk;
+			return;
 		}
 
-		return allChunks;
+		const header = this.extractHeader(doc.content);
+		const chunks = this.splitProtected(doc.content);
+		let chunkIndex = 0;
+
+		for (let i = 0; i < chunks.length; i++) {
+			let text = chunks[i];
+			if (text.trim().length < this.minChunkSize) continue;
+			if (i > 0 && header && !text.startsWith('#') && !text.startsWith(CODE_FENCE)) {
+				text = header + '\n\n' + text;
+			}
+			const chunk = this.createChunk(doc, chunkIndex, text);
+			if (sectionPath) chunk.metadata.section_path = sectionPath;
+			yield chunk;
+			chunkIndex++;
+		}
 	}
 
 	/**
@@ -92,28 +226,32 @@ export abstract class BaseChunker {
 
 	/**
 	 * Split by Markdown headers
+	 *
+	 * 单次正则扫描定位 header，直接按位置切片（不经过 split 数组和字符串拼接）
 	 */
 	protected splitByHeaders(content: string, levelPattern: string = '#{1,6}'): string[] {
-		const pattern = new RegExp(`^(${levelPattern}\\s+.+)$`, 'gm');
-		const headerTest = new RegExp(`^${levelPattern}\\s+`);
-		const parts = content.split(pattern);
-
+		const pattern = getHeaderRegex(levelPattern);
 		const sections: string[] = [];
-		let current = '';
 
-		for (const part of parts) {
-			if (headerTest.test(part)) {
-				if (current.trim()) {
-					sections.push(current.trim());
-				}
-				current = part + '\n';
-			} else {
-				current += part;
+		let header = '';
+		let bodyStart = 0;
+		pattern.lastIndex = 0;
+
+		let match: RegExpExecArray | null;
+		while ((match = pattern.exec(content)) !== null) {
+			const body = content.slice(bodyStart, match.index);
+			const section = (header ? header + '\n' + body : body).trim();
+			if (section) {
+				sections.push(section);
 			}
+			header = match[0];
+			bodyStart = match.index + header.length;
 		}
 
-		if (current.trim()) {
-			sections.push(current.trim());
+		const tail = content.slice(bodyStart);
+		const last = (header ? header + '\n' + tail : tail).trim();
+		if (last) {
+			sections.push(last);
 		}
 
 		return sections.length > 0 ? sections : [content];
@@ -130,13 +268,21 @@ export abstract class BaseChunker {
 			return [text];
 		}
 
-		// Find all code block positions
-		const codeBlockRegex = /```[\s\S]*?```/g;
+		// 不含代码块时跳过 fence 扫描与分段，直接按断点切分
+		if (!text.includes(CODE_FENCE)) {
+			return this.splitPlain(text);
+		}
+
+		// Find all code block positions（indexOf 成对匹配 fence，等价于 /```[\s\S]*?```/g）
 		const codeBlocks: Array<{ start: number; end: number }> = [];
 
-		let match: RegExpExecArray | null;
-		while ((match = codeBlockRegex.exec(text)) !== null) {
-			codeBlocks.push({ start: match.index, end: match.index + match[0].length });
+		let open = text.indexOf(CODE_FENCE);
+		while (open >= 0) {
+			const close = text.indexOf(CODE_FENCE, open + CODE_FENCE.length);
+			if (close < 0) break;
+			const end = close + CODE_FENCE.length;
+			codeBlocks.push({ start: open, end });
+			open = text.indexOf(CODE_FENCE, end);
 		}
 
 		// Split text into: regular segments and code blocks
@@ -216,31 +362,66 @@ export abstract class BaseChunker {
 	}
 
 	/**
-	 * Find best break point in text (URL-safe)
+	 * 无代码块文本的切分（与 splitProtected 的普通文本分支行为一致）
 	 */
-	protected findBreakPoint(text: string, maxPos: number): number {
-		// 优先级：段落 > 换行 > 中文句号 > 英文句号（跳过 URL 内的点）
-		const simpleSeps = ['\n\n', '\n', '\u3002'];
-		for (const sep of simpleSeps) {
-			const pos = text.lastIndexOf(sep, maxPos);
-			if (pos > maxPos / 2) {
-				return pos + sep.length;
+	private splitPlain(text: string): string[] {
+		const chunks: string[] = [];
+		let remaining = text;
+
+		while (remaining.length > this.chunkSize) {
+			const cutPoint = this.findBreakPoint(remaining, this.chunkSize);
+			const piece = remaining.slice(0, cutPoint).trim();
+			if (piece) {
+				chunks.push(piece);
 			}
+			remaining = remaining.slice(cutPoint);
+		}
+
+		const tail = remaining.trim();
+		if (tail && tail.length >= this.minChunkSize) {
+			chunks.push(tail);
 		}
 
-		// '.' 需要额外判断：句末的 '.' 后跟空白/换行/EOF，URL 内的 '.' 后跟字母数字
-		let searchPos = maxPos;
-		const halfPos = maxPos / 2;
-		while (searchPos > halfPos) {
-			const pos = text.lastIndexOf('.', searchPos);
-			if (pos <= halfPos) break;
-			const next = text[pos + 1];
-			if (!next || /\s/.test(next)) {
-				return pos + 1;
+		return chunks.length > 0 ? chunks : [text];
+	}
+
+	/**
+	 * Find best break point in text (URL-safe)
+	 */
+	protected findBreakPoint(text: string, maxPos: number): number {
+		// 优先级：段落 > 换行 > 中文句号 > 英文句号（跳过 URL 内的点）
+		// 单次扫描 (maxPos/2, maxPos]，分别记录每类分隔符最后出现的位置
+		// 只在 [0, maxPos + 2) 内匹配：maxPos 之后没有分隔符时 exec 不会扫到文本末尾；
+		// 多留两个字符，使跨越 maxPos 的换行串和 '.' 之后的前瞻判断与不截断时一致
+		const window = text.length > maxPos + 2 ? text.slice(0, maxPos + 2) : text;
+		let paragraph = -1;
+		let line = -1;
+		let cjkStop = -1;
+		let stop = -1;
+
+		BREAK_POINT_REGEX.lastIndex = Math.floor(maxPos / 2) + 1;
+		let match: RegExpExecArray | null;
+		while ((match = BREAK_POINT_REGEX.exec(window)) !== null && match.index <= maxPos) {
+			const start = match.index;
+			const first = match[0][0];
+			if (first === '\n') {
+				// 连续换行：最后一个 '\n\n' / '\n' 的起点都不能越过 maxPos
+				const end = start + match[0].length;
+				line = Math.min(end - 1, maxPos);
+				if (end - start >= 2) {
+					paragraph = Math.min(end - 2, maxPos);
+				}
+			} else if (first === '\u3002') {
+				cjkStop = start;
+			} else {
+				stop = start;
 			}
-			searchPos = pos - 1;
 		}
 
+		if (paragraph >= 0) return paragraph + 2;
+		if (line >= 0) return line + 1;
+		if (cjkStop >= 0) return cjkStop + 1;
+		if (stop >= 0) return stop + 1;
 		return maxPos;
 	}
 
@@ -65,13 +65,14 @@ export class JavaDocChunker extends BaseChunker {
 	 */
 	private *chunkApi(doc: Document): Generator<Chunk> {
 		const content = doc.content;
-		const lines = content.split('\n');
 		const className = this.extractHeaderText(content);
 
 		// Extract header: class name, package, description
+		// 只切分 header 扫描范围内的行，不拆分整篇文档
+		const headLines = content.split('\n', HEADER_SCAN_MAX_LINES + 2);
 		let headerEnd = 0;
-		for (let i = 0; i < lines.length; i++) {
-			const line = lines[i];
+		for (let i = 0; i < headLines.length; i++) {
+			const line = headLines[i];
 			if (HEADER_END_MARKERS.some(m => line.includes(m))) {
 				headerEnd = i;
 				break;
@@ -82,30 +83,30 @@ export class JavaDocChunker extends BaseChunker {
 			}
 		}
 
-		const header = lines.slice(0, headerEnd).join('\n').trim();
+		const header = headLines.slice(0, headerEnd).join('\n').trim();
 
-		// Find Method Details section
-		let detailsStart: number | null = null;
-		for (let i = 0; i < lines.length; i++) {
-			const line = lines[i];
-			if (DETAILS_MARKERS.some(m => line.includes(m))) {
-				detailsStart = i;
-				break;
+		// Find Method Details section（原生 indexOf 定位，再回退到所在行首）
+		let detailsPos = -1;
+		for (const marker of DETAILS_MARKERS) {
+			const pos = content.indexOf(marker);
+			if (pos >= 0 && (detailsPos < 0 || pos < detailsPos)) {
+				detailsPos = pos;
 			}
 		}
 
-		if (detailsStart === null) {
+		if (detailsPos < 0) {
 			yield* this.chunkBySize(doc);
 			return;
 		}
 
+		const detailLines = content.slice(content.lastIndexOf('\n', detailsPos) + 1).split('\n');
+
 		// Split methods by `### methodName` or `+ ### methodName`
 		const methods: string[] = [];
 		let currentMethod: string[] = [];
 		const methodPattern = /^\s*\+?\s*###\s+\w+/;
 
-		for (let i = detailsStart; i < lines.length; i++) {
-			const line = lines[i];
+		for (const line of detailLines) {
 			if (methodPattern.test(line)) {
 				if (currentMethod.length > 0) {
 					methods.push(currentMethod.join('\n').trim());
@@ -149,36 +150,6 @@ export class JavaDocChunker extends BaseChunker {
 		}
 	}
 
-	/**
-	 * Demo document: keep short docs whole, split large code blocks
-	 */
-	private *chunkDemo(doc: Document): Generator<Chunk> {
-		const title = this.extractHeaderText(doc.content);
-
-		if (doc.content.length <= this.chunkSize) {
-			const chunk = this.createChunk(doc, 0, doc.content);
-			if (title) chunk.metadata.section_path = [title];
-			yield chunk;
-			return;
-		}
-
-		const header = this.extractHeader(doc.content);
-		const chunks = this.splitProtected(doc.content);
-		let chunkIndex = 0;
-
-		for (let i = 0; i < chunks.length; i++) {
-			let text = chunks[i];
-			if (text.trim().length < this.minChunkSize) continue;
-			if (i > 0 && header && !text.startsWith('#') && !text.startsWith('```')) {
-				text = header + '\n\n' + text;
-			}
-			const chunk = this.createChunk(doc, chunkIndex, text);
-			if (title) chunk.metadata.section_path = [title];
-			yield chunk;
-			chunkIndex++;
-		}
-	}
-
 	/**
 	 * Docs document: split by ## or ### headers
 	 */
@@ -188,10 +159,11 @@ export class JavaDocChunker extends BaseChunker {
 		let chunkIndex = 0;
 		for (const section of sections) {
 			const h = this.extractHeaderText(section);
+			const sectionPath = h ? [h] : undefined;
 			for (const text of this.splitProtected(section)) {
 				if (text.trim().length < this.minChunkSize) continue;
 				const chunk = this.createChunk(doc, chunkIndex, text);
-				if (h) chunk.metadata.section_path = [h];
+				if (sectionPath) chunk.metadata.section_path = sectionPath;
 				yield chunk;
 				chunkIndex++;
 			}
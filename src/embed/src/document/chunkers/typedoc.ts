@@ -25,7 +25,8 @@ export class TypeDocChunker extends BaseChunker {
 				yield* this.chunkDemo(doc);
 				break;
 			default:
-				yield* this.chunkDocs(doc);
+				// Docs：同 MarkdownChunker（h2 → h3 → splitProtected + header 上下文）
+				yield* this.chunkByHeaderLevels(doc);
 		}
 	}
 
@@ -110,87 +111,6 @@ export class TypeDocChunker extends BaseChunker {
 		}
 	}
 
-	/**
-	 * Docs 文档策略：h2 主切 → h3 二次切 → splitProtected + header 上下文
-	 */
-	private *chunkDocs(doc: Document): Generator<Chunk> {
-		if (doc.content.length <= this.chunkSize) {
-			if (doc.content.trim().length >= this.minChunkSize) {
-				yield this.createChunk(doc, 0, doc.content);
-			}
-			return;
-		}
-
-		const sections = this.splitByHeaders(doc.content, '#{2}');
-		let chunkIndex = 0;
-
-		for (const section of sections) {
-			const h2 = this.extractHeaderText(section);
-
-			if (section.length <= this.chunkSize) {
-				if (section.trim().length >= this.minChunkSize) {
-					const chunk = this.createChunk(doc, chunkIndex, section);
-					if (h2) chunk.metadata.section_path = [h2];
-					yield chunk;
-					chunkIndex++;
-				}
-				continue;
-			}
-
-			// h2 section 太大 → h3 二次切分
-			const subSections = this.splitByHeaders(section, '#{3}');
-			const sectionHeader = this.extractHeader(section);
-
-			for (const sub of subSections) {
-				const h3 = this.extractHeaderText(sub);
-				const path = [h2, h3].filter(Boolean) as string[];
-				const textChunks = this.splitProtected(sub);
-
-				for (let i = 0; i < textChunks.length; i++) {
-					let text = textChunks[i];
-					if (text.trim().length < this.minChunkSize) continue;
-					if (i > 0 && sectionHeader && !text.startsWith('#')) {
-						text = sectionHeader + '\n\n' + text;
-					}
-					const chunk = this.createChunk(doc, chunkIndex, text);
-					if (path.length > 0) chunk.metadata.section_path = path;
-					yield chunk;
-					chunkIndex++;
-				}
-			}
-		}
-	}
-
-	/**
-	 * Demo 文档策略：小文件整体输出，大文件走 splitProtected（含代码块切分）
-	 */
-	private *chunkDemo(doc: Document): Generator<Chunk> {
-		const title = this.extractHeaderText(doc.content);
-
-		if (doc.content.length <= this.chunkSize) {
-			const chunk = this.createChunk(doc, 0, doc.content);
-			if (title) chunk.metadata.section_path = [title];
-			yield chunk;
-			return;
-		}
-
-		const header = this.extractHeader(doc.content);
-		const chunks = this.splitProtected(doc.content);
-		let chunkIndex = 0;
-
-		for (let i = 0; i < chunks.length; i++) {
-			let text = chunks[i];
-			if (text.trim().length < this.minChunkSize) continue;
-			if (i > 0 && header && !text.startsWith('#') && !text.startsWith('```')) {
-				text = header + '\n\n' + text;
-			}
-			const chunk = this.createChunk(doc, chunkIndex, text);
-			if (title) chunk.metadata.section_path = [title];
-			yield chunk;
-			chunkIndex++;
-		}
-	}
-
 	/**
 	 * 按大小切分 + header 上下文（fallback）
 	 */
@@ -16,6 +16,30 @@ const CATEGORY_MAP: Record<string, DocumentCategory> = {
 	demos: 'demo',
 };
 
+/** 路径分隔符（Windows / POSIX），用于生成 doc ID */
+const PATH_SEPARATOR_REGEX = /[\\/]/g;
+
+/** 并发读取的文件数上限 */
+const LOAD_CONCURRENCY = 16;
+
+// cleanHtmlFromMarkdown 使用的正则（模块加载时编译一次）
+const CODE_BLOCK_REGEX = /```[\s\S]*?```/g;
+/**
+ * HTML 清理单次扫描：span 开/闭标签 | <br>（捕获组 1） | Word 导出属性 / style / class
+ *
+ * 属性分支的 `(?<!\s)` 保证只从空白串的起点尝试 `\s*`，
+ * 避免长空白串（缩进、空行）上逐位置回溯导致的 O(n²)
+ */
+const HTML_MARKUP_REGEX = /<span[^>]*>|<\/span>|(<br\s*\/?>)|(?<!\s)\s*(?:data-ccp-props|style|class)="[^"]*"/g;
+/** 多余空白：3+ 连续换行 | 2+ 连续空格 */
+const EXCESS_WHITESPACE_REGEX = /\n{3,}| {2,}/g;
+
+const replaceMarkup = (_match: string, br: string | undefined): string => (br ? '\n' : '');
+const collapseWhitespace = (match: string): string => (match[0] === '\n' ? '\n\n' : ' ');
+
+/** 代码块占位符 */
+const CODE_BLOCK_PLACEHOLDER_REGEX = /__CODE_BLOCK_(\d+)__/g;
+
 /**
  * Clean HTML tags and CSS styles from Markdown
  * Keep: code blocks, images, links
@@ -30,46 +54,50 @@ export function cleanHtmlFromMarkdown(content: string): string {
 		return `__CODE_BLOCK_${codeBlocks.length - 1}__`;
 	};
 
-	let cleaned = content.replace(/```[\s\S]*?```/g, saveCodeBlock);
-
-	// Handle nested spans (multiple passes)
-	const MAX_NESTED_SPAN_PASSES = 5;
-	for (let i = 0; i < MAX_NESTED_SPAN_PASSES; i++) {
-		const prev = cleaned;
-		cleaned = cleaned.replace(/<span[^>]*>([^<]*)<\/span>/g, '$1');
-		if (cleaned === prev) break;
-	}
-
-	// Remove remaining empty or complex spans
-	cleaned = cleaned.replace(/<span[^>]*>\s*<\/span>/g, '');
-	cleaned = cleaned.replace(/<span[^>]*>/g, '');
-	cleaned = cleaned.replace(/<\/span>/g, '');
-
-	// <br> → newline
-	cleaned = cleaned.replace(/<br\s*\/?>/g, '\n');
+	let cleaned = content.replace(CODE_BLOCK_REGEX, saveCodeBlock);
 
-	// Remove Word export attributes
-	cleaned = cleaned.replace(/\s*data-ccp-props="[^"]*"/g, '');
-
-	// Clean style attributes
-	cleaned = cleaned.replace(/\s*style="[^"]*"/g, '');
-	cleaned = cleaned.replace(/\s*class="[^"]*"/g, '');
+	// span / br / 样式属性：一次扫描完成
+	// 开闭标签各自独立匹配，任意深度的嵌套 span 无需递归正则或多轮展开
+	cleaned = cleaned.replace(HTML_MARKUP_REGEX, replaceMarkup);
 
 	// Clean excess whitespace
-	cleaned = cleaned.replace(/\n{3,}/g, '\n\n');
-	cleaned = cleaned.replace(/ {2,}/g, ' ');
+	cleaned = cleaned.replace(EXCESS_WHITESPACE_REGEX, collapseWhitespace);
 
-	// Restore code blocks
-	for (let i = 0; i < codeBlocks.length; i++) {
-		cleaned = cleaned.replace(`__CODE_BLOCK_${i}__`, codeBlocks[i]);
+	// Restore code blocks（单次扫描；回调返回原文，避免代码中的 `$&` 等被当作替换模式）
+	if (codeBlocks.length > 0) {
+		cleaned = cleaned.replace(CODE_BLOCK_PLACEHOLDER_REGEX, (match, index: string) => codeBlocks[Number(index)] ?? match);
 	}
 
 	return cleaned.trim();
 }
 
+/** 目录级 metadata 缓存项 */
+interface DirMeta {
+	/** 目录相对 baseDir 的路径（baseDir 本身为空串） */
+	relDir: string;
+	/** 顶层目录对应的分类（baseDir 本身为 undefined） */
+	category?: DocumentCategory;
+}
+
+/**
+ * 返回第一个非 ASCII 空白字节的位置，全部为空白时返回 -1（无需解码）
+ */
+function firstNonBlankByte(raw: Buffer): number {
+	for (let i = 0; i < raw.length; i++) {
+		const byte = raw[i];
+		// \t \n \v \f \r 空格
+		if (byte !== 0x20 && (byte < 0x09 || byte > 0x0d)) {
+			return i;
+		}
+	}
+	return -1;
+}
+
 export class DocumentLoader {
 	private readonly baseDir: string;
 	private readonly categoryMap: Record<string, DocumentCategory>;
+	/** 按父目录缓存相对路径与分类，同目录文件共享 */
+	private readonly dirMetaCache = new Map<string, DirMeta>();
 
 	constructor(baseDir: string) {
 		this.baseDir = baseDir;
@@ -77,26 +105,55 @@ export class DocumentLoader {
 	}
 
 	private extractMetadata(filePath: string): Document['metadata'] {
-		const relPath = path.relative(this.baseDir, filePath);
-		const parts = relPath.split(path.sep).filter(Boolean);
+		const dir = path.dirname(filePath);
+		let dirMeta = this.dirMetaCache.get(dir);
+		if (!dirMeta) {
+			dirMeta = this.resolveDirMeta(dir);
+			this.dirMetaCache.set(dir, dirMeta);
+		}
+
+		const fileName = path.basename(filePath);
+		const relPath = dirMeta.relDir ? dirMeta.relDir + path.sep + fileName : fileName;
 
-		const metadata: Document['metadata'] = {
+		return {
 			relative_path: relPath,
+			// 直接位于 baseDir 下的文件没有顶层目录，沿用文件名作为分类
+			category: dirMeta.category ?? this.toCategory(fileName),
 		};
+	}
 
-		if (parts.length > 0) {
-			const topDir = parts[0].toLowerCase();
-			metadata.category = this.categoryMap[topDir] ?? (topDir as DocumentCategory);
+	/**
+	 * 计算目录相对 baseDir 的路径及顶层目录对应的分类
+	 */
+	private resolveDirMeta(dir: string): DirMeta {
+		const relDir = path.relative(this.baseDir, dir);
+		if (!relDir) {
+			return { relDir };
 		}
+		const sepIndex = relDir.indexOf(path.sep);
+		const topDir = sepIndex < 0 ? relDir : relDir.slice(0, sepIndex);
+		return { relDir, category: this.toCategory(topDir) };
+	}
 
-		return metadata;
+	private toCategory(topDir: string): DocumentCategory {
+		const key = topDir.toLowerCase();
+		return this.categoryMap[key] ?? (key as DocumentCategory);
 	}
 
 	private async loadFile(filePath: string): Promise<Document | null> {
 		try {
-			let content = await fs.readFile(filePath, 'utf-8');
+			const raw = await fs.readFile(filePath);
+
+			// 空白文件直接跳过，不做 UTF-8 解码
+			const firstByte = firstNonBlankByte(raw);
+			if (firstByte < 0) {
+				return null;
+			}
+
+			let content = raw.toString('utf-8');
 
-			if (!content.trim()) {
+			// 首个非空白字节为多字节字符（可能是全角空格等 Unicode 空白）时按字符串判断
+			if (raw[firstByte] >= 0x80 && !content.trim()) {
 				return null;
 			}
 
@@ -104,8 +161,12 @@ export class DocumentLoader {
 			const metadata = this.extractMetadata(filePath);
 
 			// Generate document ID from relative path
-			let docId = metadata.relative_path.replace(/\\/g, '/').replace(/\//g, '_');
-			docId = docId.replace(/\.[^.]+$/, '');
+			let docId = metadata.relative_path.replace(PATH_SEPARATOR_REGEX, '_');
+			// 去掉扩展名（等价于 /\.[^.]+$/）
+			const dot = docId.lastIndexOf('.');
+			if (dot >= 0 && dot < docId.length - 1) {
+				docId = docId.slice(0, dot);
+			}
 
 			return {
 				id: docId,
@@ -140,37 +201,67 @@ export class DocumentLoader {
 			searchDirs.push(this.baseDir);
 		}
 
+		const files: string[] = [];
 		for (const searchDir of searchDirs) {
-			for (const ext of extensions) {
-				const files = await this.findFiles(searchDir, ext);
-				for (const filePath of files) {
-					const doc = await this.loadFile(filePath);
-					if (doc) {
-						yield doc;
-					}
+			// 一次遍历同时收集所有扩展名，按扩展名分桶后拼接（保持原有的文档顺序）
+			const buckets = extensions.map((): string[] => []);
+			await this.findFiles(searchDir, extensions, buckets);
+			for (const bucket of buckets) {
+				for (const filePath of bucket) {
+					files.push(filePath);
 				}
 			}
 		}
+
+		yield* this.loadFiles(files);
 	}
 
-	private async findFiles(dir: string, ext: string): Promise<string[]> {
-		const files: string[] = [];
+	/**
+	 * 并发读取文件，按原顺序产出
+	 *
+	 * 保持最多 LOAD_CONCURRENCY 个读取在途，重叠磁盘 / 网络文件系统延迟；
+	 * 消费端处理当前文档时，后续文件已在读取
+	 */
+	private async *loadFiles(files: string[]): AsyncGenerator<Document> {
+		const inflight: Array<Promise<Document | null>> = [];
+		let next = 0;
+
+		while (next < files.length && inflight.length < LOAD_CONCURRENCY) {
+			inflight.push(this.loadFile(files[next++]));
+		}
+
+		while (inflight.length > 0) {
+			const doc = await inflight.shift()!;
+			if (next < files.length) {
+				inflight.push(this.loadFile(files[next++]));
+			}
+			if (doc) {
+				yield doc;
+			}
+		}
+	}
+
+	/**
+	 * 递归查找文件，按扩展名追加到对应的 buckets[i]（不为每层目录创建中间数组）
+	 */
+	private async findFiles(dir: string, extensions: string[], buckets: string[][]): Promise<void> {
 		const entries = await fs.readdir(dir, { withFileTypes: true });
 
 		for (const entry of entries) {
-			const fullPath = path.join(dir, entry.name);
-
 			if (entry.isDirectory()) {
-				const subFiles = await this.findFiles(fullPath, ext);
-				files.push(...subFiles);
-			} else if (entry.isFile() && entry.name.endsWith(ext)) {
-				files.push(fullPath);
+				await this.findFiles(path.join(dir, entry.name), extensions, buckets);
+			} else if (entry.isFile()) {
+				const extIndex = extensions.findIndex(ext => entry.name.endsWith(ext));
+				if (extIndex >= 0) {
+					buckets[extIndex].push(path.join(dir, entry.name));
+				}
 			}
 		}
-
-		return files;
 	}
 
+	/**
+	 * @deprecated 会物化全部文档，使用 loadDirectory() 流式消费
+	 */
 	public async loadAll(subdirs?: string[]): Promise<Document[]> {
 		const docs: Document[] = [];
 		for await (const doc of this.loadDirectory(subdirs)) {
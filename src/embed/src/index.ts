@@ -16,8 +16,10 @@ import {
 	createVoyageEmbedder,
 	createVoyageRateLimiter,
 	createDefaultLogger,
+	QdrantClient,
 } from '@gc-doc/shared';
 import { DocumentLoader } from './document/loader.js';
+import type { Document } from './document/types.js';
 import { createChunker } from './document/chunker.js';
 import { createIndexer } from './indexer.js';
 
@@ -37,6 +39,7 @@ async function embedProduct(
 	productId: string,
 	lang: string,
 	embedder: ReturnType<typeof createVoyageEmbedder>,
+	qdrant: QdrantClient,
 	force: boolean,
 ): Promise<void> {
 	const config = await loadConfig(productId, lang);
@@ -46,16 +49,33 @@ async function embedProduct(
 	logger.info(`Raw data: ${rawDataDir}`);
 	logger.info(`Subdirs: ${config.product.doc_subdirs.join(', ')}`);
 
-	// 1. 加载文档
+	// 1. 加载文档（流式：边读取边分块、索引，不物化全部文档）
 	const loader = new DocumentLoader(rawDataDir);
-	const docs = await loader.loadAll(config.product.doc_subdirs);
-	logger.info(`Loaded ${docs.length} documents`);
+	const docIter = loader.loadDirectory(config.product.doc_subdirs);
 
-	if (docs.length === 0) {
+	// 先取首个文档：没有文档时不触碰 collection（--force 也不删除旧数据）
+	const first = await docIter.next();
+	if (first.done) {
 		logger.warn('No documents found, skipping');
 		return;
 	}
 
+	const firstDoc = first.value;
+	let docCount = 0;
+	/** restart 为 true 时重新读取全部文档（checkpoint 失效后 indexer 重新索引一遍） */
+	async function* loadedDocs(restart: boolean): AsyncGenerator<Document> {
+		docCount = 0;
+		const docs = restart ? loader.loadDirectory(config.product.doc_subdirs) : docIter;
+		if (!restart) {
+			docCount++;
+			yield firstDoc;
+		}
+		for await (const doc of docs) {
+			docCount++;
+			yield doc;
+		}
+	}
+
 	// 2. 分块
 	const env = getEnv();
 	const chunker = createChunker(config.product.chunker, {
@@ -63,13 +83,11 @@ async function embedProduct(
 		min_chunk_size: 50,
 	});
 
-	const allChunks = chunker.chunkDocuments(docs);
-	logger.info(`Generated ${allChunks.length} chunks from ${docs.length} documents`);
-
-	// 3. 索引
+	// 3. 索引（分块结果流式送入 indexer，按批写入）
 	const indexer = createIndexer({
 		qdrantUrl: env.QDRANT_URL,
 		qdrantApiKey: env.QDRANT_API_KEY,
+		qdrant,
 		collection: config.variant.collection,
 		embedder,
 		batchSize: env.BATCH_SIZE,
@@ -79,11 +97,15 @@ async function embedProduct(
 
 	await indexer.initCollection(force);
 
-	const stats = await indexer.indexChunks(allChunks);
+	// checkpoint 失效时 indexer 会再次调用工厂，重新读取文档生成完整的流
+	let passes = 0;
+	const stats = await indexer.indexChunks(() => chunker.iterChunksAsync(loadedDocs(passes++ > 0)));
 	const elapsed = (stats.durationMs / 1000).toFixed(1);
 
+	logger.info(`Loaded ${docCount} documents, generated ${stats.totalChunks} chunks`);
+
 	logger.info(
-		`Done: ${stats.successCount} indexed, ${stats.skippedCount} skipped, ` +
+		`Done: ${stats.successCount} indexed, ${stats.unchangedCount} unchanged, ${stats.skippedCount} skipped, ` +
 		`${stats.failedCount} failed (${elapsed}s)`,
 	);
 
@@ -106,11 +128,15 @@ async function main(): Promise<void> {
 	const embedder = createVoyageEmbedder({
 		apiKey: env.VOYAGE_API_KEY,
 		model: env.VOYAGE_EMBED_MODEL,
+		concurrency: env.VOYAGE_CONCURRENCY,
 		rateLimiter,
 	});
 
+	// 所有产品共享同一个 Qdrant 客户端
+	const qdrant = new QdrantClient(env.QDRANT_URL, env.QDRANT_API_KEY);
+
 	for (const productId of productIds) {
-		await embedProduct(productId, env.DOC_LANG, embedder, force);
+		await embedProduct(productId, env.DOC_LANG, embedder, qdrant, force);
 	}
 
 	logger.info('All done.');
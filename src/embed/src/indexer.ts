@@ -9,6 +9,15 @@ import { QdrantClient, BM25_MODEL, type UpsertPoint, VoyageEmbedder, Logger } fr
 import { Chunk } from './document/types.js';
 import { promises as fs } from 'fs';
 import { join } from 'path';
+import { createHash } from 'crypto';
+
+/** 单次 upsert 的 point 数 */
+const UPSERT_BATCH_SIZE = 32;
+/** 单批内并行的 upsert 请求数 */
+const UPSERT_CONCURRENCY = 4;
+
+/** chunks 来源；传工厂函数或数组时，断点失效后可重新遍历完整的流 */
+export type ChunkSource = Iterable<Chunk> | AsyncIterable<Chunk>;
 
 export interface IndexerConfig {
 	qdrant: QdrantClient;
@@ -24,9 +33,34 @@ export interface IndexStats {
 	successCount: number;
 	failedCount: number;
 	skippedCount: number;
+	/** 内容未变化、跳过 embedding 和写入的 chunk 数 */
+	unchangedCount: number;
 	durationMs: number;
 }
 
+/**
+ * chunk 内容指纹（embedding 模型 + 维度 + content + metadata），写入 payload.content_hash，
+ * 重新索引时据此跳过未变化的 chunk；更换模型后所有 chunk 都会重新 embedding
+ *
+ * @param embeddingKey - `${model}:${dim}`
+ */
+function contentHash(chunk: Chunk, embeddingKey: string): string {
+	return createHash('sha1')
+		.update(embeddingKey)
+		.update('\0')
+		.update(chunk.content)
+		.update('\0')
+		.update(JSON.stringify(chunk.metadata))
+		.digest('hex');
+}
+
+/** 已完成 embedding、待写入的一批 */
+interface PreparedBatch {
+	points: UpsertPoint[];
+	/** 内容未变化、无需写入的 chunk 数 */
+	unchanged: number;
+}
+
 export interface CheckpointData {
 	lastProcessedId: string | null;
 	timestamp: number;
@@ -39,6 +73,11 @@ export class RagIndexer {
 	private readonly batchSize: number;
 	private readonly checkpointPath: string | undefined;
 	private readonly logger: Logger;
+	/** 写入 content_hash 的 embedding 标识（模型 + 维度） */
+	private readonly embeddingKey: string;
+	private checkpointDirReady = false;
+	/** collection 是否为本次新建（新建时无需查询已有 point） */
+	private collectionFresh = false;
 
 	constructor(config: IndexerConfig) {
 		this.qdrant = config.qdrant;
@@ -47,6 +86,7 @@ export class RagIndexer {
 		this.batchSize = config.batchSize;
 		this.checkpointPath = config.checkpointPath;
 		this.logger = config.logger ?? new Logger();
+		this.embeddingKey = `${config.embedder.getModel()}:${config.embedder.getEmbeddingDim()}`;
 	}
 
 	async initCollection(forceRecreate = false): Promise<void> {
@@ -61,75 +101,178 @@ export class RagIndexer {
 			this.logger.info(`Creating collection: ${this.collection}`);
 			const vectorSize = this.embedder.getEmbeddingDim();
 			await this.qdrant.createCollection(this.collection, vectorSize);
+			this.collectionFresh = true;
+		} else {
+			// 旧 collection 补建 payload 索引
+			await this.qdrant.ensurePayloadIndexes(this.collection);
 		}
 	}
 
-	async indexChunks(chunks: Chunk[]): Promise<IndexStats> {
+	/**
+	 * 流式索引：按 batchSize 攒批写入，调用方无需物化全部 chunks
+	 *
+	 * 两级流水线：第 N 批 upsert 的同时对第 N+1 批做 embedding，
+	 * 同一时刻最多一批在写入，内存占用上限约为两批 points。
+	 * checkpoint 仍按批次顺序、在该批写入完成后保存。
+	 *
+	 * 断点续传时直接丢弃断点之前的 chunks（不暂存）。断点 ID 不在流中时（文档已变化）
+	 * checkpoint 视为失效：chunks 为工厂函数或数组则重新遍历、完整索引一遍
+	 * （未变化的 chunk 由 content_hash 跳过）；一次性的流无法重新遍历，
+	 * 清除失效的 checkpoint 后抛出错误，下次运行从头索引。
+	 *
+	 * @throws Error 一次性的流中找不到 checkpoint（本次未写入任何 chunk）
+	 */
+	async indexChunks(chunks: ChunkSource | (() => ChunkSource)): Promise<IndexStats> {
 		const startTime = Date.now();
-
 		const checkpoint = await this.loadCheckpoint();
-		let resumeFrom = 0;
-
-		if (checkpoint.lastProcessedId) {
-			const idx = chunks.findIndex(c => c.id === checkpoint.lastProcessedId);
-			if (idx >= 0) {
-				resumeFrom = idx + 1;
-				this.logger.info(`Resuming from chunk ${resumeFrom} (${checkpoint.lastProcessedId})`);
-			}
-		}
+		const resumeId = checkpoint.lastProcessedId;
 
+		let totalChunks = 0;
 		let successCount = 0;
 		let failedCount = 0;
-		const skippedCount = resumeFrom;
-		const totalBatches = Math.ceil((chunks.length - resumeFrom) / this.batchSize);
+		let skippedCount = 0;
+		let unchangedCount = 0;
+		let batchNum = 0;
+		let batch: Chunk[] = [];
+		/** 正在写入的上一批（写入完成后才保存其 checkpoint） */
+		let writing: Promise<void> | null = null;
+
+		const waitForWrite = async (): Promise<void> => {
+			if (!writing) return;
+			const current = writing;
+			writing = null;
+			await current;
+		};
+
+		const onBatchError = (current: Chunk[], num: number, error: unknown): void => {
+			failedCount += current.length;
+			this.logger.error(`Failed to index batch ${num} starting at ${current[0].id}`, { error: error instanceof Error ? error.message : String(error) });
+		};
 
-		for (let i = resumeFrom; i < chunks.length; i += this.batchSize) {
-			const batch = chunks.slice(i, i + this.batchSize);
-			const batchNum = Math.floor((i - resumeFrom) / this.batchSize) + 1;
-			const progress = ((i - resumeFrom + batch.length) / (chunks.length - resumeFrom) * 100).toFixed(1);
+		const flush = async (): Promise<void> => {
+			if (batch.length === 0) return;
+			const current = batch;
+			batch = [];
+			const num = ++batchNum;
 
+			let prepared: PreparedBatch;
 			try {
-				await this.indexBatch(batch);
-				successCount += batch.length;
+				prepared = await this.prepareBatch(current);
+			} catch (error) {
+				// 先等上一批写完再抛出，避免进程退出时留下写了一半的批次
+				await waitForWrite().catch(() => undefined);
+				onBatchError(current, num, error);
+				throw error;
+			}
+
+			// 上一批写入失败时在这里抛出
+			await waitForWrite();
 
-				const lastChunk = batch[batch.length - 1];
-				await this.saveCheckpoint(lastChunk.id);
+			writing = this.writePoints(prepared.points).then(
+				async () => {
+					successCount += current.length - prepared.unchanged;
+					unchangedCount += prepared.unchanged;
 
-				this.logger.info(
-					`[${progress}%] batch ${batchNum}/${totalBatches} ` +
-					`(${i + batch.length}/${chunks.length} chunks)`,
+					const lastChunk = current[current.length - 1];
+					await this.saveCheckpoint(lastChunk.id);
+
+					this.logger.info(`batch ${num} (${skippedCount + unchangedCount + successCount} chunks done)`);
+				},
+				(error: unknown) => {
+					onBatchError(current, num, error);
+					throw error;
+				},
+			);
+			// 错误由下一次 waitForWrite 抛出，这里仅防止 unhandled rejection
+			writing.catch(() => undefined);
+		};
+
+		/**
+		 * 消费一遍 chunks；skipUntil 非空时丢弃直到该 ID（含）的 chunks
+		 *
+		 * @returns 是否命中 skipUntil（skipUntil 为空时恒为 true）
+		 */
+		const consume = async (source: ChunkSource, skipUntil: string | null): Promise<boolean> => {
+			let skipping = skipUntil !== null;
+			for await (const chunk of source) {
+				totalChunks++;
+
+				if (skipping) {
+					skippedCount++;
+					if (chunk.id === skipUntil) {
+						skipping = false;
+						this.logger.info(`Resuming from chunk ${skippedCount} (${skipUntil})`);
+					}
+					continue;
+				}
+
+				batch.push(chunk);
+				if (batch.length >= this.batchSize) {
+					await flush();
+				}
+			}
+			return !skipping;
+		};
+
+		// 数组可以重新遍历，与工厂函数同样处理
+		const reopen = typeof chunks === 'function'
+			? chunks
+			: Array.isArray(chunks) ? () => chunks : null;
+		const resumed = await consume(reopen ? reopen() : chunks as ChunkSource, resumeId);
+
+		if (!resumed) {
+			if (!reopen) {
+				// 所有 chunks 都被当作断点前的内容丢弃，不能报告为成功
+				await this.clearCheckpoint();
+				throw new Error(
+					`Checkpoint ${resumeId} not found in chunk stream: all ${skippedCount} chunks were skipped ` +
+					'and none were indexed. The stale checkpoint has been cleared, run again to index from the start',
 				);
-			} catch (error) {
-				failedCount += batch.length;
-				this.logger.error(`Failed to index batch starting at ${i}`, { error: error instanceof Error ? error.message : String(error) });
-				throw error;
 			}
+			this.logger.warn(`Checkpoint ${resumeId} not found in chunk stream, re-indexing from the start`);
+			totalChunks = 0;
+			skippedCount = 0;
+			await consume(reopen(), null);
 		}
+		await flush();
+		await waitForWrite();
 
 		await this.clearCheckpoint();
 
 		return {
-			totalChunks: chunks.length,
+			totalChunks,
 			successCount,
 			failedCount,
 			skippedCount,
+			unchangedCount,
 			durationMs: Date.now() - startTime,
 		};
 	}
 
 	/**
-	 * 索引单批 chunks
+	 * 为单批 chunks 生成 points
 	 *
 	 * 每个 point 包含:
 	 * - dense: Voyage embedding
 	 * - bm25: 原文文本 (Qdrant 服务端 BM25 推理)
+	 *
+	 * 已存在且 content_hash 相同的 chunk 跳过 embedding 和写入
 	 */
-	private async indexBatch(chunks: Chunk[]): Promise<void> {
-		if (chunks.length === 0) return;
+	private async prepareBatch(batch: Chunk[]): Promise<PreparedBatch> {
+
+		const hashes = new Map<string, string>();
+		for (const chunk of batch) {
+			hashes.set(chunk.id, contentHash(chunk, this.embeddingKey));
+		}
+
+		const chunks = await this.filterUnchanged(batch, hashes);
+		const unchanged = batch.length - chunks.length;
+		if (chunks.length === 0) return { points: [], unchanged };
 
 		const texts = chunks.map(c => c.content);
 		const embedResults = await this.embedder.embedBatch(texts);
 
+		// 一次构建最终的 point 结构（payload 含 chunk_id，upsert 时不再复制）
 		const points: UpsertPoint[] = embedResults.map((er, idx) => {
 			const chunk = chunks[idx];
 			return {
@@ -142,16 +285,58 @@ export class RagIndexer {
 					content: chunk.content,
 					doc_id: chunk.doc_id,
 					chunk_index: chunk.chunk_index,
+					chunk_id: chunk.id,
+					content_hash: hashes.get(chunk.id),
 					metadata: chunk.metadata,
 				},
 			};
 		});
 
+		return { points, unchanged };
+	}
+
+	/**
+	 * 写入单批 points
+	 */
+	private async writePoints(points: UpsertPoint[]): Promise<void> {
+		if (points.length === 0) return;
+
 		// Upsert 分小批写入（每个 point 含全文 BM25 text，payload 较大）
-		const upsertBatchSize = 32;
-		for (let j = 0; j < points.length; j += upsertBatchSize) {
-			await this.qdrant.upsert(this.collection, points.slice(j, j + upsertBatchSize));
+		// 最多 UPSERT_CONCURRENCY 个请求并行，重叠网络往返与服务端 BM25 推理
+		let next = 0;
+		const worker = async (): Promise<void> => {
+			while (next < points.length) {
+				const start = next;
+				next += UPSERT_BATCH_SIZE;
+				await this.qdrant.upsert(this.collection, points.slice(start, start + UPSERT_BATCH_SIZE));
+			}
+		};
+
+		const workerCount = Math.min(UPSERT_CONCURRENCY, Math.ceil(points.length / UPSERT_BATCH_SIZE));
+		await Promise.all(Array.from({ length: workerCount }, worker));
+	}
+
+	/**
+	 * 过滤掉 Qdrant 中已存在且 content_hash 一致的 chunk（新建的 collection 直接返回）
+	 */
+	private async filterUnchanged(batch: Chunk[], hashes: Map<string, string>): Promise<Chunk[]> {
+		if (this.collectionFresh) return batch;
+
+		const existing = await this.qdrant.retrievePayloads(
+			this.collection,
+			batch.map(c => c.id),
+			['chunk_id', 'content_hash'],
+		);
+
+		const unchangedIds = new Set<string>();
+		for (const payload of existing) {
+			const chunkId = payload.chunk_id as string | undefined;
+			if (chunkId && payload.content_hash === hashes.get(chunkId)) {
+				unchangedIds.add(chunkId);
+			}
 		}
+
+		return unchangedIds.size > 0 ? batch.filter(c => !unchangedIds.has(c.id)) : batch;
 	}
 
 	private async loadCheckpoint(): Promise<CheckpointData> {
@@ -169,10 +354,17 @@ export class RagIndexer {
 	private async saveCheckpoint(chunkId: string): Promise<void> {
 		if (!this.checkpointPath) return;
 
+		// 目录只需创建一次，之后每批仅写入一个小 JSON
+		if (!this.checkpointDirReady) {
+			await fs.mkdir(join(this.checkpointPath, '..'), { recursive: true });
+			this.checkpointDirReady = true;
+		}
+
+		// 先写临时文件再 rename（同目录内原子替换），进程中断不会留下截断的 checkpoint
 		const data: CheckpointData = { lastProcessedId: chunkId, timestamp: Date.now() };
-		const dir = join(this.checkpointPath, '..');
-		await fs.mkdir(dir, { recursive: true });
-		await fs.writeFile(this.checkpointPath, JSON.stringify(data, null, 2));
+		const tmpPath = `${this.checkpointPath}.tmp`;
+		await fs.writeFile(tmpPath, JSON.stringify(data));
+		await fs.rename(tmpPath, this.checkpointPath);
 	}
 
 	private async clearCheckpoint(): Promise<void> {
@@ -199,6 +391,8 @@ export class RagIndexer {
 export interface CreateIndexerOptions {
 	qdrantUrl: string;
 	qdrantApiKey?: string;
+	/** 共享的 Qdrant 客户端（多产品复用同一连接）；未提供时按 qdrantUrl 新建 */
+	qdrant?: QdrantClient;
 	collection: string;
 	embedder: VoyageEmbedder;
 	batchSize?: number;
@@ -207,7 +401,7 @@ export interface CreateIndexerOptions {
 }
 
 export function createIndexer(options: CreateIndexerOptions): RagIndexer {
-	const qdrant = new QdrantClient(options.qdrantUrl, options.qdrantApiKey);
+	const qdrant = options.qdrant ?? new QdrantClient(options.qdrantUrl, options.qdrantApiKey);
 
 	return new RagIndexer({
 		qdrant,
@@ -9,8 +9,10 @@ import {
 	createVoyageRateLimiter,
 	createDefaultLogger,
 	ConfigError,
+	QdrantClient,
 } from '@gc-doc/shared';
 import { createSearcher } from './rag/searcher.js';
+import { QueryEmbeddingBatcher } from './rag/query-batcher.js';
 import { startServer } from './http.js';
 import type { ProductEntry, ServerHandle } from './http.js';
 
@@ -32,6 +34,11 @@ async function main(): Promise<void> {
 			model: env.VOYAGE_EMBED_MODEL,
 			rateLimiter,
 		});
+		// 并发查询合并为一次 embedding 请求
+		const queryBatcher = new QueryEmbeddingBatcher(embedder);
+
+		// 所有产品共享同一个 Qdrant 客户端
+		const qdrant = new QdrantClient(env.QDRANT_URL, env.QDRANT_API_KEY);
 
 		// 为每个产品加载配置并创建 searcher（跳过缺失配置的产品）
 		const results = await Promise.all(
@@ -41,14 +48,17 @@ async function main(): Promise<void> {
 					const searcher = createSearcher({
 						qdrantUrl: env.QDRANT_URL,
 						qdrantApiKey: env.QDRANT_API_KEY,
+						qdrant,
 						collection: config.variant.collection,
 						docLanguage: config.variant.doc_language,
 						embedder,
+						queryBatcher,
 						rerankModel: env.VOYAGE_RERANK_MODEL,
 						voyageApiKey: env.VOYAGE_API_KEY,
 						prefetchLimit: config.product.search.prefetch_limit,
 						rerankTopK: config.product.search.rerank_top_k,
 						denseScoreThreshold: config.product.search.dense_score_threshold,
+						hnswEf: config.product.search.hnsw_ef,
 					});
 					logger.info(`Loaded: ${config.product.name} (${config.variant.collection})`);
 					return { config, searcher };
@@ -42,6 +42,7 @@ export function createSearchHandler(
 				fusionMode: response.fusion_mode,
 				detectedLang: response.detected_lang,
 				rerankUsed: response.rerank_used,
+				stageTimings: response.stage_timings,
 			},
 		};
 	});
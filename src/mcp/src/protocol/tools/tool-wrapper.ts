@@ -7,7 +7,7 @@
  * Tool-specific fields (args, search metadata, etc.) are provided by each handler via `meta`.
  */
 
-import type { Logger, ResolvedConfig } from '@gc-doc/shared';
+import { LogLevel, type Logger, type ResolvedConfig } from '@gc-doc/shared';
 import { requestContext } from '../../request-context.js';
 
 interface ToolResult {
@@ -36,17 +36,20 @@ export function withToolLogging<TArgs>(
 
 		try {
 			const { content, meta } = await fn(args);
-			const { resultCount, ...extra } = meta;
-			logger.info('tool call', {
-				requestId: ctx?.requestId ?? '-',
-				sessionId: ctx?.sessionId ?? '-',
-				productId: config.product.id,
-				client: ctx?.clientInfo ?? null,
-				clientIp: ctx?.clientIp ?? 'unknown',
-				durationMs: Date.now() - start,
-				resultCount,
-				...extra,
-			});
+			// INFO 关闭时不构建日志字段
+			if (logger.isLevelEnabled(LogLevel.INFO)) {
+				const { resultCount, ...extra } = meta;
+				logger.info('tool call', {
+					requestId: ctx?.requestId ?? '-',
+					sessionId: ctx?.sessionId ?? '-',
+					productId: config.product.id,
+					client: ctx?.clientInfo ?? null,
+					clientIp: ctx?.clientIp ?? 'unknown',
+					durationMs: Date.now() - start,
+					resultCount,
+					...extra,
+				});
+			}
 			return { content };
 		} catch (err) {
 			logger.error('tool call', {
@@ -1,56 +1,53 @@
 /**
  * 语言检测模块
  *
- * 使用 franc 包进行语言检测，支持中文、英文、日文
+ * 只需区分中文、英文、日文，三者按 Unicode 文字范围即可分开，
+ * 逐字符统计假名 / 汉字 / 拉丁字母数量判断，无需统计模型
  */
 
-import { franc } from 'franc';
 import type { Language } from '@gc-doc/shared';
 
-/** franc 对短文本检测不准确的最小长度阈值 */
-const MIN_DETECTION_LENGTH = 10;
-
-/** franc 语言代码 → Language 映射 */
-const LANG_MAP: Record<string, Language> = {
-	// 中文简体
-	zho: 'zh',
-	cmn: 'zh',
-	lzh: 'zh',
-	// 英文
-	eng: 'en',
-	// 日文
-	jpn: 'ja',
-};
+/**
+ * 汉字与拉丁字母的权重比：一个汉字约相当于一个英文单词（3 个以上字母），
+ * 中英混写的查询（如 "如何使用 setValue"）仍判为中文
+ */
+const HAN_WEIGHT = 3;
 
 /**
  * 检测文本语言
  *
+ * - 含假名 → ja（日文必然含平假名/片假名，中文没有）
+ * - 汉字 × HAN_WEIGHT ≥ 拉丁字母数 → zh
+ * - 含拉丁字母 → en
+ * - 其余（纯数字、符号、其他文字）→ fallback
+ *
  * @param text - 要检测的文本
  * @param fallback - 无法检测时的默认语言
  * @returns 检测到的语言代码
  */
 export function detectLanguage(text: string, fallback: Language = 'en'): Language {
-	if (!text || text.trim().length === 0) {
-		return fallback;
-	}
+	let kana = 0;
+	let han = 0;
+	let latin = 0;
 
-	// franc 对短文本检测不准确，设置最小长度
-	if (text.trim().length < MIN_DETECTION_LENGTH) {
-		return fallback;
-	}
-
-	try {
-		const langCode = franc(text);
-		const detected = LANG_MAP[langCode];
-
-		if (detected) {
-			return detected;
+	for (let i = 0; i < text.length; i++) {
+		const code = text.charCodeAt(i);
+		if (code < 0x80) {
+			// ASCII 字母
+			if ((code | 0x20) >= 0x61 && (code | 0x20) <= 0x7a) latin++;
+		} else if ((code >= 0x3040 && code <= 0x30ff) || (code >= 0xff66 && code <= 0xff9f)) {
+			// 平假名、片假名、半角片假名
+			kana++;
+		} else if ((code >= 0x4e00 && code <= 0x9fff) || (code >= 0x3400 && code <= 0x4dbf)) {
+			// CJK 统一汉字及扩展 A
+			han++;
 		}
-
-		return fallback;
-	} catch {
-		return fallback;
 	}
+
+	if (kana > 0) return 'ja';
+	if (han > 0 && han * HAN_WEIGHT >= latin) return 'zh';
+	if (latin > 0) return 'en';
+	return fallback;
 }
 
 /** 批量检测语言（返回最频繁的语言） */
@@ -0,0 +1,80 @@
+/**
+ * 查询 embedding 微批合并 + 缓存
+ *
+ * 空闲时查询立即发送；已有请求在途时，期间到达的查询（可来自不同产品）排队，
+ * 待在途请求返回后合并为一次 embedBatch 调用。单用户场景不增加延迟，
+ * 负载高时显著减少 Voyage API 调用次数；重复查询直接命中缓存，不再请求 Voyage
+ */
+
+import { LruCache, type VoyageEmbedder } from '@gc-doc/shared';
+
+/** 单次合并的最大查询数（排队达到此数量时不再等待在途请求） */
+const DEFAULT_MAX_BATCH = 32;
+/** 查询 embedding 缓存容量（embedder 的模型在进程内固定，按查询文本做 key 即可） */
+const QUERY_CACHE_SIZE = 1024;
+
+interface PendingQuery {
+	text: string;
+	resolve: (embedding: number[]) => void;
+	reject: (error: unknown) => void;
+}
+
+export class QueryEmbeddingBatcher {
+	private queue: PendingQuery[] = [];
+	/** 在途的 embedBatch 请求数 */
+	private inFlight = 0;
+	/** 查询文本 → embedding（缓存 Promise，进行中的相同查询也只请求一次） */
+	private readonly cache = new LruCache<string, Promise<number[]>>(QUERY_CACHE_SIZE);
+
+	constructor(
+		private readonly embedder: VoyageEmbedder,
+		private readonly maxBatch: number = DEFAULT_MAX_BATCH,
+	) {}
+
+	/**
+	 * 嵌入单条查询（命中缓存直接返回；空闲时立即发送，否则与排队的查询合并发送）
+	 */
+	embed(text: string): Promise<number[]> {
+		const cached = this.cache.get(text);
+		if (cached) {
+			return cached;
+		}
+
+		const promise = this.enqueue(text);
+		this.cache.set(text, promise);
+		// 失败的结果不缓存，下次重新请求
+		promise.catch(() => this.cache.delete(text));
+		return promise;
+	}
+
+	private enqueue(text: string): Promise<number[]> {
+		return new Promise((resolve, reject) => {
+			this.queue.push({ text, resolve, reject });
+
+			if (this.inFlight === 0 || this.queue.length >= this.maxBatch) {
+				this.flush();
+			}
+		});
+	}
+
+	private flush(): void {
+		const batch = this.queue.splice(0, this.maxBatch);
+		if (batch.length === 0) return;
+
+		this.inFlight++;
+		this.embedder.embedBatch(batch.map(q => q.text)).then(
+			(results) => {
+				batch.forEach((q, idx) => q.resolve(results[idx].embedding));
+			},
+			(error: unknown) => {
+				for (const q of batch) {
+					q.reject(error);
+				}
+			},
+		).finally(() => {
+			this.inFlight--;
+			// 在途期间排队的查询合并为下一批
+			this.flush();
+		});
+	}
+}
@@ -7,8 +7,9 @@
  * - Voyage rerank 精排
  */
 
-import { QdrantClient, type QdrantSearchResult, VoyageEmbedder, ApiError, Logger } from '@gc-doc/shared';
+import { QdrantClient, type QdrantSearchResult, type QdrantScrollResult, VoyageEmbedder, ApiError, Logger, LogLevel, LruCache } from '@gc-doc/shared';
 import { detectLanguage } from './language-detect.js';
+import type { QueryEmbeddingBatcher } from './query-batcher.js';
 import type {
 	ISearcher,
 	SearchResponse,
@@ -16,16 +17,52 @@ import type {
 	DocChunk,
 	ChunkMetadata,
 	InternalSearchResult,
+	StageTimings,
 } from './types.js';
 
 const PREVIEW_LENGTH = 200;
-const MAX_DOC_CHUNKS = 100;
+/** getDocChunks 每页 scroll 的 point 数 */
+const DOC_CHUNKS_PAGE_SIZE = 256;
+/** getDocChunks 需要的 payload 字段 */
+const DOC_CHUNK_PAYLOAD_FIELDS = ['chunk_index', 'content', 'metadata'];
 const DEFAULT_VOYAGE_BASE_URL = 'https://api.voyageai.com/v1';
+/**
+ * 送入 rerank 的单个文档最大字符数
+ * 常规 chunk（CHUNK_SIZE 默认 3000）不受影响，只截断保留完整长代码块的超大 chunk；
+ * rerank 按 token 计费，且开头部分已足够判断相关性
+ */
+const MAX_RERANK_CHARS = 4000;
+/** 搜索结果缓存容量（相同 query + limit + rerank 直接返回） */
+const RESULT_CACHE_SIZE = 512;
+/** 搜索结果缓存有效期：重新索引后的结果最迟在此时间后生效 */
+const RESULT_CACHE_TTL_MS = 5 * 60_000;
+
+/** 自 start（performance.now()）起的耗时，保留两位小数 */
+function elapsedMs(start: number): number {
+	return Math.round((performance.now() - start) * 100) / 100;
+}
+
+/**
+ * 复制结果列表（数组、每条结果及其 metadata），调用方修改返回值不会影响缓存中的响应
+ */
+function copyResults(results: SearchResult[]): SearchResult[] {
+	return results.map(r => ({ ...r, metadata: { ...r.metadata } }));
+}
+
+/** finalizeResults 之前已测得的阶段耗时 */
+type RetrievalTimings = Pick<StageTimings, 'embed_ms' | 'lang_detect_ms' | 'qdrant_ms'>;
+
+interface CachedResponse {
+	response: SearchResponse;
+	expiresAt: number;
+}
 
 export interface SearcherConfig {
 	qdrant: QdrantClient;
 	collection: string;
 	embedder: VoyageEmbedder;
+	/** 查询 embedding 微批合并器（多个 searcher 共享）；未提供时直接调用 embedder */
+	queryBatcher?: QueryEmbeddingBatcher;
 	/** 文档主语言 (zh/en/ja) */
 	docLanguage: string;
 	/** Voyage Rerank 模型 */
@@ -40,6 +77,8 @@ export interface SearcherConfig {
 	denseScoreThreshold: number;
 	/** RRF k 参数 (Qdrant 1.16+) */
 	rrfK?: number;
+	/** Dense 检索的 HNSW ef（未设置时使用 Qdrant 默认值） */
+	hnswEf?: number;
 	/** Voyage API base URL */
 	voyageBaseUrl?: string;
 	logger?: Logger;
@@ -70,7 +109,7 @@ class VoyageReranker {
 				},
 				body: JSON.stringify({
 					query,
-					documents: documents.map(d => d.content),
+					documents: documents.map(d => d.content.slice(0, MAX_RERANK_CHARS)),
 					model: this.model,
 					top_k: Math.min(topK, documents.length),
 				}),
@@ -107,15 +146,18 @@ class VoyageReranker {
 
 /** Qdrant 结果 → InternalSearchResult（从 payload 读 chunk_id/doc_id） */
 function mapQdrantResults(results: QdrantSearchResult[]): InternalSearchResult[] {
-	return results.map(r => ({
-		id: (r.payload?.chunk_id as string) ?? String(r.id),
-		score: r.score,
-		content: (r.payload?.content as string) ?? '',
-		metadata: {
-			...((r.payload?.metadata as Record<string, unknown>) ?? {}),
-			doc_id: r.payload?.doc_id,
-		},
-	}));
+	return results.map(r => {
+		const payload = r.payload ?? {};
+		return {
+			id: (payload.chunk_id as string) ?? String(r.id),
+			score: r.score,
+			content: (payload.content as string) ?? '',
+			metadata: {
+				...((payload.metadata as Record<string, unknown>) ?? {}),
+				doc_id: payload.doc_id,
+			},
+		};
+	});
 }
 
 /**
@@ -124,6 +166,7 @@ function mapQdrantResults(results: QdrantSearchResult[]): InternalSearchResult[]
 export class RagSearcher implements ISearcher {
 	private readonly qdrant: QdrantClient;
 	private readonly embedder: VoyageEmbedder;
+	private readonly queryBatcher: QueryEmbeddingBatcher | undefined;
 	private readonly reranker: VoyageReranker | undefined;
 	private readonly logger: Logger;
 	private readonly collection: string;
@@ -132,16 +175,20 @@ export class RagSearcher implements ISearcher {
 	private readonly rerankTopK: number;
 	private readonly denseScoreThreshold: number;
 	private readonly rrfK: number;
+	private readonly hnswEf: number | undefined;
+	private readonly resultCache = new LruCache<string, CachedResponse>(RESULT_CACHE_SIZE);
 
 	constructor(config: SearcherConfig) {
 		this.qdrant = config.qdrant;
 		this.embedder = config.embedder;
+		this.queryBatcher = config.queryBatcher;
 		this.collection = config.collection;
 		this.docLanguage = config.docLanguage;
 		this.prefetchLimit = config.prefetchLimit;
 		this.rerankTopK = config.rerankTopK;
 		this.denseScoreThreshold = config.denseScoreThreshold;
 		this.rrfK = config.rrfK ?? 60;
+		this.hnswEf = config.hnswEf;
 		this.logger = config.logger ?? new Logger();
 
 		if (config.voyageApiKey && config.rerankModel) {
@@ -153,39 +200,108 @@ export class RagSearcher implements ISearcher {
 	async search(query: string, limit?: number, useRerank?: boolean): Promise<SearchResponse> {
 		const startTime = Date.now();
 		const finalLimit = limit ?? this.rerankTopK;
+
+		const cacheKey = `${finalLimit}|${useRerank !== false}|${query}`;
+		const cached = this.resultCache.get(cacheKey);
+		if (cached && cached.expiresAt > startTime) {
+			return {
+				...cached.response,
+				results: copyResults(cached.response.results),
+				search_time_ms: Date.now() - startTime,
+				stage_timings: undefined,
+			};
+		}
+
+		// 先发出 embedding 请求，网络往返期间同步完成语言检测（BM25 由 Qdrant 服务端推理）
+		const embedStart = performance.now();
+		const denseVectorPromise = this.embedQuery(query);
+		const detectStart = performance.now();
 		const detectedLang = detectLanguage(query);
+		const langDetectMs = elapsedMs(detectStart);
 		const useBm25 = detectedLang === this.docLanguage;
 
-		this.logger.debug(
-			`Search: "${query.substring(0, 50)}..." ` +
-			`lang=${detectedLang} doc=${this.docLanguage} bm25=${useBm25}`,
-		);
+		if (this.logger.isLevelEnabled(LogLevel.DEBUG)) {
+			this.logger.debug(
+				`Search: "${query.substring(0, 50)}..." ` +
+				`lang=${detectedLang} doc=${this.docLanguage} bm25=${useBm25}`,
+			);
+		}
 
-		const denseVector = await this.embedder.embed(query);
+		const denseVector = await denseVectorPromise;
+		const embedMs = elapsedMs(embedStart);
 
-		const prefetchLimit = (useRerank !== false && this.reranker) ? this.prefetchLimit : finalLimit;
+		const prefetchLimit = this.getPrefetchLimit(finalLimit, useRerank);
 		let candidates: QdrantSearchResult[];
 		let fusionMode: 'rrf' | 'dense_only';
 
+		const qdrantStart = performance.now();
 		if (useBm25) {
 			candidates = await this.qdrant.queryHybrid(
-				this.collection, denseVector, query, prefetchLimit, this.rrfK,
+				this.collection, denseVector, query, prefetchLimit, this.rrfK, this.hnswEf,
 			);
 			fusionMode = 'rrf';
 		} else {
 			candidates = await this.qdrant.queryDense(
-				this.collection, denseVector, prefetchLimit, this.denseScoreThreshold,
+				this.collection, denseVector, prefetchLimit, this.denseScoreThreshold, this.hnswEf,
 			);
 			fusionMode = 'dense_only';
 		}
 
+		const timings: RetrievalTimings = {
+			embed_ms: embedMs,
+			lang_detect_ms: langDetectMs,
+			qdrant_ms: elapsedMs(qdrantStart),
+		};
+
+		const response = await this.finalizeResults(
+			query, candidates, fusionMode, detectedLang, finalLimit, useRerank, startTime, timings,
+		);
+
+		// rerank 失败降级的结果不缓存，下次重新请求
+		const rerankRequested = useRerank !== false && this.reranker !== undefined;
+		if (response.rerank_used || !rerankRequested) {
+			this.resultCache.set(cacheKey, {
+				response: { ...response, results: copyResults(response.results) },
+				expiresAt: Date.now() + RESULT_CACHE_TTL_MS,
+			});
+		}
+
+		return response;
+	}
+
+	/** 查询 embedding：有 queryBatcher 时经其合并与缓存 */
+	private embedQuery(query: string): Promise<number[]> {
+		return (this.queryBatcher ?? this.embedder).embed(query);
+	}
+
+	/** 需要 rerank 时多取候选，否则直接取最终数量 */
+	private getPrefetchLimit(finalLimit: number, useRerank?: boolean): number {
+		return (useRerank !== false && this.reranker) ? this.prefetchLimit : finalLimit;
+	}
+
+	/**
+	 * 候选 → rerank → 截断 → SearchResponse
+	 */
+	private async finalizeResults(
+		query: string,
+		candidates: QdrantSearchResult[],
+		fusionMode: SearchResponse['fusion_mode'],
+		detectedLang: string,
+		finalLimit: number,
+		useRerank: boolean | undefined,
+		startTime: number,
+		timings: RetrievalTimings,
+	): Promise<SearchResponse> {
 		this.logger.debug(`Retrieved ${candidates.length} candidates (${fusionMode})`);
 
 		let results = mapQdrantResults(candidates);
 
 		let rerankUsed = false;
+		let rerankMs = 0;
 		if (useRerank !== false && this.reranker) {
+			const rerankStart = performance.now();
 			const reranked = await this.reranker.rerank(query, results, this.rerankTopK);
+			rerankMs = elapsedMs(rerankStart);
 			results = reranked.results;
 			rerankUsed = reranked.success;
 		}
@@ -207,6 +323,11 @@ export class RagSearcher implements ISearcher {
 			query,
 			results: searchResults,
 			search_time_ms: Date.now() - startTime,
+			stage_timings: {
+				...timings,
+				rerank_ms: rerankMs,
+				candidate_count: candidates.length,
+			},
 			rerank_used: rerankUsed,
 			fusion_mode: fusionMode,
 			detected_lang: detectedLang,
@@ -215,23 +336,33 @@ export class RagSearcher implements ISearcher {
 	}
 
 	async getDocChunks(docId: string): Promise<DocChunk[]> {
-		const scrollResult = await this.qdrant.scroll(
-			this.collection,
-			{ must: [{ key: 'doc_id', match: { value: docId } }] },
-			MAX_DOC_CHUNKS,
-		);
+		const filter = { must: [{ key: 'doc_id', match: { value: docId } }] };
+		const points: QdrantScrollResult['points'] = [];
+
+		// 逐页读取，超长文档不会被截断
+		let offset: string | number | undefined;
+		do {
+			const page = await this.qdrant.scroll(
+				this.collection, filter, DOC_CHUNKS_PAGE_SIZE, DOC_CHUNK_PAYLOAD_FIELDS, offset,
+			);
+			points.push(...page.points);
+			offset = page.nextPageOffset ?? undefined;
+		} while (offset !== undefined);
 
-		if (scrollResult.points.length === 0) {
+		if (points.length === 0) {
 			return [];
 		}
 
-		return scrollResult.points
-			.map((p: { id: string | number; payload?: Record<string, unknown> | null }) => ({
-				chunk_id: String(p.id),
-				chunk_index: (p.payload?.chunk_index as number) ?? 0,
-				content: (p.payload?.content as string) ?? '',
-				metadata: (p.payload?.metadata as ChunkMetadata) ?? { relative_path: '', category: '' },
-			}))
+		return points
+			.map((p: { id: string | number; payload?: Record<string, unknown> | null }) => {
+				const payload = p.payload ?? {};
+				return {
+					chunk_id: String(p.id),
+					chunk_index: (payload.chunk_index as number) ?? 0,
+					content: (payload.content as string) ?? '',
+					metadata: (payload.metadata as ChunkMetadata) ?? { relative_path: '', category: '' },
+				};
+			})
 			.sort((a, b) => a.chunk_index - b.chunk_index);
 	}
 }
@@ -240,9 +371,12 @@ export class RagSearcher implements ISearcher {
 export interface CreateSearcherOptions {
 	qdrantUrl: string;
 	qdrantApiKey?: string;
+	/** 共享的 Qdrant 客户端（多产品复用同一连接）；未提供时按 qdrantUrl 新建 */
+	qdrant?: QdrantClient;
 	collection: string;
 	docLanguage: string;
 	embedder: VoyageEmbedder;
+	queryBatcher?: QueryEmbeddingBatcher;
 	rerankModel?: string;
 	voyageApiKey?: string;
 	voyageBaseUrl?: string;
@@ -250,17 +384,19 @@ export interface CreateSearcherOptions {
 	rerankTopK: number;
 	denseScoreThreshold: number;
 	rrfK?: number;
+	hnswEf?: number;
 	logger?: Logger;
 }
 
 export function createSearcher(options: CreateSearcherOptions): RagSearcher {
-	const qdrant = new QdrantClient(options.qdrantUrl, options.qdrantApiKey);
+	const qdrant = options.qdrant ?? new QdrantClient(options.qdrantUrl, options.qdrantApiKey);
 
 	return new RagSearcher({
 		qdrant,
 		collection: options.collection,
 		docLanguage: options.docLanguage,
 		embedder: options.embedder,
+		queryBatcher: options.queryBatcher,
 		rerankModel: options.rerankModel,
 		voyageApiKey: options.voyageApiKey,
 		voyageBaseUrl: options.voyageBaseUrl,
@@ -268,6 +404,7 @@ export function createSearcher(options: CreateSearcherOptions): RagSearcher {
 		rerankTopK: options.rerankTopK,
 		denseScoreThreshold: options.denseScoreThreshold,
 		rrfK: options.rrfK,
+		hnswEf: options.hnswEf,
 		logger: options.logger,
 	});
 }
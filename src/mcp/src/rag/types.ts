@@ -25,10 +25,26 @@ export interface DocChunk {
 	metadata: ChunkMetadata;
 }
 
+/**
+ * 各阶段耗时（毫秒）与候选数，用于定位瓶颈（只写日志，不返回给 LLM）
+ *
+ * embed_ms 与 lang_detect_ms 并行：embedding 请求在途时完成语言检测
+ */
+export interface StageTimings {
+	embed_ms: number;
+	lang_detect_ms: number;
+	qdrant_ms: number;
+	rerank_ms: number;
+	/** Qdrant 返回的候选数（rerank 前） */
+	candidate_count: number;
+}
+
 export interface SearchResponse {
 	query: string;
 	results: SearchResult[];
 	search_time_ms: number;
+	/** 命中结果缓存时不提供 */
+	stage_timings?: StageTimings;
 	rerank_used: boolean;
 	fusion_mode: 'rrf' | 'dense_only';
 	detected_lang: string;
@@ -22,6 +22,7 @@ export const envSchema = z.object({
 	VOYAGE_RERANK_MODEL: z.string().default('rerank-2.5'),
 	VOYAGE_RPM_LIMIT: z.coerce.number().int().positive().default(2000),
 	VOYAGE_TPM_LIMIT: z.coerce.number().int().positive().default(3000000),
+	VOYAGE_CONCURRENCY: z.coerce.number().int().positive().default(4),
 
 	// === Qdrant ===
 	QDRANT_URL: z.string().url('QDRANT_URL must be a valid URL').default('http://localhost:6333'),
@@ -34,6 +34,8 @@ const DEFAULT_SEARCH_CONFIG: SearchConfig = {
 	rerank_top_k: 10,
 	default_limit: 5,
 	dense_score_threshold: 0.3,
+	// 未指定时 Qdrant 按 ef_construct（100）搜索；rerank 前只取 prefetch_limit 条候选，ef 64 足够
+	hnsw_ef: 64,
 };
 
 /**
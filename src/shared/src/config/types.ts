@@ -20,6 +20,8 @@ export interface SearchConfig {
 	default_limit: number;
 	/** Dense search score threshold */
 	dense_score_threshold: number;
+	/** HNSW search beam size for dense search (default 64) */
+	hnsw_ef: number;
 }
 
 /**
@@ -133,6 +135,7 @@ export const productYamlSchema = z.object({
 		rerank_top_k: z.number(),
 		default_limit: z.number(),
 		dense_score_threshold: z.number(),
+		hnsw_ef: z.number().int().positive(),
 	}).partial().optional(),
 	instructions: z.string().optional(),
 });
@@ -8,7 +8,7 @@
  */
 
 import { VoyageAIClient } from 'voyageai';
-import { RateLimiter } from './rate-limiter.js';
+import { RateLimiter, type RateLimitHandle } from './rate-limiter.js';
 import { ApiError, RateLimitError } from './errors.js';
 import { Logger } from './logger.js';
 
@@ -23,6 +23,8 @@ export interface EmbedderConfig {
 	maxRetries?: number;
 	/** 初始重试延迟（毫秒） */
 	retryDelay?: number;
+	/** 并行的 embedding 请求数（默认 1，即串行） */
+	concurrency?: number;
 	/** 速率限制器 */
 	rateLimiter?: RateLimiter;
 	logger?: Logger;
@@ -37,15 +39,53 @@ export interface EmbedResult {
 	tokens: number;
 }
 
+/** 按 token 上限切好的一批文本 */
+interface TokenBatch {
+	texts: string[];
+	/** 每段文本的估算 token 数（与 texts 一一对应） */
+	tokenCounts: number[];
+	/** tokenCounts 之和 */
+	totalTokens: number;
+}
+
 /** Voyage API 单次 batch 的 token 上限（实际限制 120k，留 50% 余量应对估算偏差） */
 const MAX_BATCH_TOKENS = 60_000;
 
+/** Voyage 返回 429 且未带 Retry-After 时的退避时间（秒） */
+const RATE_LIMIT_BACKOFF_SECONDS = 5;
+
+/**
+ * 从 SDK 错误的响应头读取 Retry-After（秒数或 HTTP 日期），无法读取时返回 undefined
+ */
+function getRetryAfterSeconds(error: unknown): number | undefined {
+	const headers = (error as { rawResponse?: { headers?: unknown } }).rawResponse?.headers;
+	if (!headers) return undefined;
+
+	const value = typeof (headers as Headers).get === 'function'
+		? (headers as Headers).get('retry-after')
+		: (headers as Record<string, string | undefined>)['retry-after'];
+	if (!value) return undefined;
+
+	const seconds = Number(value);
+	if (Number.isFinite(seconds)) return Math.max(0, seconds);
+
+	const date = Date.parse(value);
+	return Number.isNaN(date) ? undefined : Math.max(0, Math.ceil((date - Date.now()) / 1000));
+}
+
 /**
  * 估算文本 token 数
  * 保守估算：英文/代码 2.5 字符/token（代码 token 密度高），中文 1.5 字符/token
  */
 function estimateTokens(text: string): number {
-	const chineseChars = (text.match(/[\u4e00-\u9fa5]/g) || []).length;
+	// 逐字符计数，不为每个汉字分配正则匹配结果
+	let chineseChars = 0;
+	for (let i = 0; i < text.length; i++) {
+		const code = text.charCodeAt(i);
+		if (code >= 0x4e00 && code <= 0x9fa5) {
+			chineseChars++;
+		}
+	}
 	const otherChars = text.length - chineseChars;
 	return Math.ceil(chineseChars / 1.5 + otherChars / 2.5);
 }
@@ -67,6 +107,7 @@ export class VoyageEmbedder {
 			batchSize: config.batchSize,
 			maxRetries: config.maxRetries ?? 3,
 			retryDelay: config.retryDelay ?? 1000,
+			concurrency: Math.max(1, config.concurrency ?? 1),
 		};
 		this.rateLimiter = config.rateLimiter;
 		this.logger = config.logger ?? new Logger();
@@ -82,50 +123,84 @@ export class VoyageEmbedder {
 
 	/**
 	 * 批量嵌入（按 token 数动态分批，避免超出 Voyage API 的 batch token 限制）
+	 *
+	 * 最多 concurrency 个批次同时请求，结果按输入顺序返回
 	 */
 	async embedBatch(texts: string[]): Promise<EmbedResult[]> {
 		if (texts.length === 0) {
 			return [];
 		}
 
-		const allResults: EmbedResult[] = [];
+		const batches = this.splitTokenBatches(texts);
+		const batchResults: EmbedResult[][] = new Array(batches.length);
+
+		let next = 0;
+		// 任一批次失败后其余 worker 不再领取新批次（结果已无用，且 429 时只会加重限流）
+		let failed = false;
+		const worker = async (): Promise<void> => {
+			while (!failed && next < batches.length) {
+				const idx = next++;
+				const { texts: batchTexts, tokenCounts, totalTokens } = batches[idx];
+				try {
+					batchResults[idx] = await this.embedBatchWithRetry(batchTexts, tokenCounts, totalTokens);
+				} catch (error) {
+					failed = true;
+					throw error;
+				}
+			}
+		};
+
+		const workerCount = Math.min(this.config.concurrency, batches.length);
+		await Promise.all(Array.from({ length: workerCount }, worker));
+
+		return batchResults.flat();
+	}
 
-		let batch: string[] = [];
-		let batchTokens = 0;
+	/**
+	 * 按 token 上限与 batchSize 切分批次
+	 *
+	 * 分批时逐文本估算的 token 数随批次传下去，发送与重试时不再重复估算
+	 */
+	private splitTokenBatches(texts: string[]): TokenBatch[] {
+		const batches: TokenBatch[] = [];
+		let current: TokenBatch = { texts: [], tokenCounts: [], totalTokens: 0 };
 
 		for (const text of texts) {
 			const tokens = estimateTokens(text);
 
-			if (batch.length > 0 && (batchTokens + tokens > MAX_BATCH_TOKENS || batch.length >= this.config.batchSize)) {
-				const results = await this.embedBatchWithRetry(batch);
-				allResults.push(...results);
-				batch = [];
-				batchTokens = 0;
+			if (current.texts.length > 0 && (current.totalTokens + tokens > MAX_BATCH_TOKENS || current.texts.length >= this.config.batchSize)) {
+				batches.push(current);
+				current = { texts: [], tokenCounts: [], totalTokens: 0 };
 			}
 
-			batch.push(text);
-			batchTokens += tokens;
+			current.texts.push(text);
+			current.tokenCounts.push(tokens);
+			current.totalTokens += tokens;
 		}
 
-		if (batch.length > 0) {
-			const results = await this.embedBatchWithRetry(batch);
-			allResults.push(...results);
+		if (current.texts.length > 0) {
+			batches.push(current);
 		}
 
-		return allResults;
+		return batches;
 	}
 
 	/**
 	 * 带重试的批量嵌入
+	 *
+	 * @param tokenCounts - 每段文本的估算 token 数（与 texts 一一对应）
+	 * @param totalTokens - tokenCounts 之和
 	 */
-	private async embedBatchWithRetry(texts: string[], attempt = 1): Promise<EmbedResult[]> {
-		try {
-			// 估算 token 数
-			const totalTokens = texts.reduce((sum, text) => sum + estimateTokens(text), 0);
-
-			// 检查速率限制
-			this.rateLimiter?.checkAndRecord(totalTokens);
+	private async embedBatchWithRetry(
+		texts: string[],
+		tokenCounts: number[],
+		totalTokens: number,
+		attempt = 1,
+	): Promise<EmbedResult[]> {
+		// 本地限流窗口已满或服务端退避期间先等待（不计入重试次数），避免未发出的批次耗尽重试
+		const rateLimitHandle = await this.acquireRateLimit(totalTokens);
 
+		try {
 			this.logger.debug(`Embedding ${texts.length} texts, ~${totalTokens} tokens`);
 
 			const response = await this.client.embed({
@@ -133,11 +208,17 @@ export class VoyageEmbedder {
 				model: this.config.model,
 			});
 
+			// 用 API 返回的实际 token 数修正限流器中的估算值
+			const actualTokens = response.usage?.totalTokens;
+			if (actualTokens !== undefined && rateLimitHandle) {
+				this.rateLimiter?.adjust(rateLimitHandle, actualTokens - totalTokens);
+			}
+
 			const embeddings = response.data ?? [];
 			const results: EmbedResult[] = texts.map((text, idx) => ({
 				text,
 				embedding: embeddings[idx]?.embedding ?? [],
-				tokens: estimateTokens(text),
+				tokens: tokenCounts[idx],
 			}));
 
 			// 验证向量维度
@@ -151,18 +232,24 @@ export class VoyageEmbedder {
 
 			return results;
 		} catch (error) {
-			const isRetryable = this.isRetryableError(error);
+			// 服务端 429：通知限流器，让所有并发请求一起退避（优先使用 Retry-After）
+			const serverRateLimited = this.isRateLimitResponse(error);
+			const serverRetryAfter = serverRateLimited
+				? getRetryAfterSeconds(error) ?? RATE_LIMIT_BACKOFF_SECONDS
+				: 0;
+			if (serverRateLimited) {
+				this.rateLimiter?.registerFailure(serverRetryAfter);
+			}
+
+			const isRetryable = serverRateLimited || this.isRetryableError(error);
 			const shouldRetry = attempt < this.config.maxRetries && isRetryable;
 
 			if (shouldRetry) {
-				const delay = this.config.retryDelay * Math.pow(2, attempt - 1);
+				// 服务端限流时至少等到退避结束，否则重试只会再次被拒
+				const delay = Math.max(this.config.retryDelay * Math.pow(2, attempt - 1), serverRetryAfter * 1000);
 				this.logger.warn(`Embed failed (attempt ${attempt}), retrying in ${delay}ms`, { error: error instanceof Error ? error.message : String(error) });
 				await this.sleep(delay);
-				return this.embedBatchWithRetry(texts, attempt + 1);
-			}
-
-			if (error instanceof RateLimitError) {
-				throw error;
+				return this.embedBatchWithRetry(texts, tokenCounts, totalTokens, attempt + 1);
 			}
 
 			throw new ApiError(
@@ -173,13 +260,47 @@ export class VoyageEmbedder {
 		}
 	}
 
+	/**
+	 * 占用限流配额，窗口已满或服务端退避中时等待到可用为止
+	 *
+	 * 多个 worker 共享同一限流窗口，等待本地配额不是 API 失败，不消耗重试次数
+	 *
+	 * @throws RateLimitError 单批 token 数超过 TPM 上限（等待也无法满足）
+	 */
+	private async acquireRateLimit(totalTokens: number): Promise<RateLimitHandle | undefined> {
+		const limiter = this.rateLimiter;
+		if (!limiter) {
+			return undefined;
+		}
+
+		for (;;) {
+			try {
+				return limiter.checkAndRecord(totalTokens);
+			} catch (error) {
+				if (!(error instanceof RateLimitError) || !error.retryAfter) {
+					throw error;
+				}
+				// 服务端退避按毫秒等待；本地窗口按 retryAfter（已向上取整到秒）等待
+				await this.sleep(limiter.getBackoffRemainingMs() || error.retryAfter * 1000);
+			}
+		}
+	}
+
+	/**
+	 * 判断是否为 Voyage 服务端返回的 429
+	 */
+	private isRateLimitResponse(error: unknown): boolean {
+		if (!(error instanceof Error) || error instanceof RateLimitError) {
+			return false;
+		}
+		// 只看状态码：错误信息里的 "429" 可能来自 request id、token 数或 URL
+		return (error as { statusCode?: number }).statusCode === 429;
+	}
+
 	/**
 	 * 判断错误是否可重试
 	 */
 	private isRetryableError(error: unknown): boolean {
-		if (error instanceof RateLimitError) {
-			return true;
-		}
 		if (error instanceof Error) {
 			const message = error.message.toLowerCase();
 			return (
@@ -202,6 +323,13 @@ export class VoyageEmbedder {
 		return new Promise(resolve => setTimeout(resolve, ms));
 	}
 
+	/**
+	 * 获取 embedding 模型名
+	 */
+	getModel(): string {
+		return this.config.model;
+	}
+
 	/**
 	 * 获取嵌入维度
 	 */
@@ -225,6 +353,8 @@ export interface CreateVoyageEmbedderOptions {
 	model?: string;
 	embeddingDim?: number;
 	batchSize?: number;
+	/** 并行的 embedding 请求数 */
+	concurrency?: number;
 	rateLimiter?: RateLimiter;
 	logger?: Logger;
 }
@@ -260,6 +390,7 @@ export function createVoyageEmbedder(options: CreateVoyageEmbedderOptions = {}):
 		model,
 		embeddingDim: options.embeddingDim ?? defaults.dim,
 		batchSize: options.batchSize ?? 128,
+		concurrency: options.concurrency,
 		rateLimiter: options.rateLimiter,
 		logger: options.logger,
 	});
@@ -16,7 +16,9 @@ export type { LoggerOptions } from './logger.js';
 export { ConfigError, SearchError, ApiError, RateLimitError } from './errors.js';
 
 export { RateLimiter, createVoyageRateLimiter } from './rate-limiter.js';
-export type { RateLimiterConfig } from './rate-limiter.js';
+export type { RateLimiterConfig, RateLimitHandle } from './rate-limiter.js';
+
+export { LruCache } from './lru-cache.js';
 
 // RAG primitives
 export { QdrantClient, BM25_MODEL, stringToUuid } from './qdrant-client.js';
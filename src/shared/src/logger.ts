@@ -37,6 +37,22 @@ function colorize(text: string, colorCode: number): string {
 	return `\x1b[${colorCode}m${text}\x1b[0m`;
 }
 
+/** TTY 模式下的彩色级别标签（预先计算，避免每条日志 padEnd + colorize） */
+const TTY_LEVEL_LABELS: Record<LogLevel, string> = {
+	[LogLevel.DEBUG]: colorize(LEVEL_NAMES[LogLevel.DEBUG].padEnd(5), LEVEL_COLORS[LogLevel.DEBUG]),
+	[LogLevel.INFO]:  colorize(LEVEL_NAMES[LogLevel.INFO].padEnd(5), LEVEL_COLORS[LogLevel.INFO]),
+	[LogLevel.WARN]:  colorize(LEVEL_NAMES[LogLevel.WARN].padEnd(5), LEVEL_COLORS[LogLevel.WARN]),
+	[LogLevel.ERROR]: colorize(LEVEL_NAMES[LogLevel.ERROR].padEnd(5), LEVEL_COLORS[LogLevel.ERROR]),
+};
+
+/** 是否含有任意附加字段（不分配 Object.keys 数组） */
+function hasFields(data: Record<string, unknown> | undefined): data is Record<string, unknown> {
+	for (const _key in data) {
+		return true;
+	}
+	return false;
+}
+
 /**
  * 日志类 — 支持 TTY 彩色输出 / 非 TTY JSON Lines
  */
@@ -62,29 +78,27 @@ export class Logger {
 		this.level = level;
 	}
 
+	/** 指定级别是否会输出（用于跳过昂贵的日志参数构建） */
+	isLevelEnabled(level: LogLevel): boolean {
+		return level >= this.level;
+	}
+
 	private log(level: LogLevel, message: string, data?: Record<string, unknown>): void {
-		if (level < this.level) return;
+		if (!this.isLevelEnabled(level)) return;
 
 		try {
 			const ts = new Date().toISOString();
-			const levelName = LEVEL_NAMES[level];
 			const stream = level >= LogLevel.ERROR ? process.stderr : process.stdout;
 
 			if (isTTY) {
 				const prefix = this.prefix ? `[${this.prefix}] ` : '';
-				const colored = colorize(levelName.padEnd(5), LEVEL_COLORS[level]);
-				const extra = data && Object.keys(data).length > 0
-					? ' ' + JSON.stringify(data)
-					: '';
-				stream.write(`${ts} ${colored} ${prefix}${message}${extra}\n`);
+				const extra = hasFields(data) ? ' ' + JSON.stringify(data) : '';
+				stream.write(`${ts} ${TTY_LEVEL_LABELS[level]} ${prefix}${message}${extra}\n`);
 			} else {
-				const entry: Record<string, unknown> = {
-					ts,
-					level: levelName,
-					...(this.prefix ? { module: this.prefix } : {}),
-					msg: message,
-					...data,
-				};
+				const entry: Record<string, unknown> = { ts, level: LEVEL_NAMES[level] };
+				if (this.prefix) entry.module = this.prefix;
+				entry.msg = message;
+				if (hasFields(data)) Object.assign(entry, data);
 				stream.write(JSON.stringify(entry) + '\n');
 			}
 		} catch {
@@ -0,0 +1,54 @@
+/**
+ * LRU 缓存
+ *
+ * 基于 Map 的插入顺序：命中时移到末尾，超出容量时淘汰最早插入的条目
+ */
+
+export class LruCache<K, V> {
+	private readonly maxSize: number;
+	private readonly map = new Map<K, V>();
+
+	constructor(maxSize: number) {
+		this.maxSize = maxSize;
+	}
+
+	/**
+	 * 读取并标记为最近使用
+	 */
+	get(key: K): V | undefined {
+		const value = this.map.get(key);
+		if (value === undefined) {
+			return undefined;
+		}
+		this.map.delete(key);
+		this.map.set(key, value);
+		return value;
+	}
+
+	/**
+	 * 写入（已存在则刷新为最近使用），超出容量时淘汰最久未使用的条目
+	 */
+	set(key: K, value: V): void {
+		if (this.map.has(key)) {
+			this.map.delete(key);
+		} else if (this.map.size >= this.maxSize) {
+			const oldest = this.map.keys().next();
+			if (!oldest.done) {
+				this.map.delete(oldest.value);
+			}
+		}
+		this.map.set(key, value);
+	}
+
+	delete(key: K): boolean {
+		return this.map.delete(key);
+	}
+
+	get size(): number {
+		return this.map.size;
+	}
+
+	clear(): void {
+		this.map.clear();
+	}
+}
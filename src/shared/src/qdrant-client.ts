@@ -11,6 +11,9 @@ import { createHash } from 'node:crypto';
 /** Qdrant 内置 BM25 推理模型 */
 export const BM25_MODEL = 'Qdrant/bm25';
 
+/** 搜索结果需要的 payload 字段（content_hash 等索引内部字段不返回），所有查询共用同一个 selector */
+const SEARCH_PAYLOAD_SELECTOR = { include: ['chunk_id', 'doc_id', 'content', 'metadata'] };
+
 /** 字符串 ID → 确定性 UUID（MD5 哈希） */
 export function stringToUuid(str: string): string {
 	const hex = createHash('md5').update(str).digest('hex');
@@ -19,11 +22,13 @@ export function stringToUuid(str: string): string {
 
 /** Upsert point: named dense + BM25 text inference */
 export interface UpsertPoint {
+	/** 业务 ID（chunk_id），写入时转换为 UUID */
 	id: string;
 	vector: {
 		dense: number[];
 		bm25: { text: string; model: string };
 	};
+	/** 原样写入，不再复制（调用方负责写入 chunk_id 等检索所需字段） */
 	payload: Record<string, unknown>;
 }
 
@@ -34,6 +39,27 @@ export interface QdrantSearchResult {
 	payload?: Record<string, unknown> | null;
 }
 
+/** 单条查询（queryHybrid / queryDense 构建请求体使用） */
+type QdrantQuery =
+	| {
+		/** dense + BM25 → RRF 融合 */
+		mode: 'hybrid';
+		denseVector: number[];
+		queryText: string;
+		limit: number;
+		rrfK?: number;
+		/** dense 分支的 HNSW ef（未设置时使用 Qdrant 默认值） */
+		hnswEf?: number;
+	}
+	| {
+		/** dense only (跨语言) */
+		mode: 'dense';
+		denseVector: number[];
+		limit: number;
+		scoreThreshold?: number;
+		hnswEf?: number;
+	};
+
 /** Scroll 结果 */
 export interface QdrantScrollResult {
 	points: Array<{
@@ -74,6 +100,18 @@ export class QdrantClient {
 				indexing_threshold: 10000,
 			},
 		});
+		await this.ensurePayloadIndexes(collection);
+	}
+
+	/**
+	 * 为按文档读取 chunks 建立 payload 索引（幂等，已存在时不重复创建）
+	 *
+	 * 只索引 doc_id（keyword）：fetch 按 doc_id 过滤时不再全量扫描 payload。
+	 * chunk_index 不建索引：没有查询按它过滤或排序（getDocChunks 在客户端排序），
+	 * 索引只会增加内存占用和每次 upsert 的写入开销
+	 */
+	async ensurePayloadIndexes(collection: string): Promise<void> {
+		await this.sdk.createPayloadIndex(collection, { field_name: 'doc_id', field_schema: 'keyword', wait: true });
 	}
 
 	async collectionExists(collection: string): Promise<boolean> {
@@ -99,11 +137,28 @@ export class QdrantClient {
 			points: points.map(p => ({
 				id: stringToUuid(p.id),
 				vector: p.vector as unknown as Record<string, number[]>,
-				payload: { ...p.payload, chunk_id: p.id },
+				payload: p.payload,
 			})),
 		}));
 	}
 
+	/**
+	 * 按业务 ID 批量读取 point 的部分 payload（不取向量），不存在的 ID 不会出现在结果中
+	 */
+	async retrievePayloads(
+		collection: string,
+		pointIds: string[],
+		fields: string[],
+	): Promise<Array<Record<string, unknown>>> {
+		if (pointIds.length === 0) return [];
+		const records = await this.withRetry(() => this.sdk.retrieve(collection, {
+			ids: pointIds.map(stringToUuid),
+			with_payload: { include: fields },
+			with_vector: false,
+		}));
+		return records.map(r => (r.payload ?? {}) as Record<string, unknown>);
+	}
+
 	async deletePoints(collection: string, pointIds: string[]): Promise<void> {
 		if (pointIds.length === 0) return;
 		await this.sdk.delete(collection, { points: pointIds.map(stringToUuid) });
@@ -120,16 +175,12 @@ export class QdrantClient {
 		queryText: string,
 		limit: number,
 		rrfK = 60,
+		hnswEf?: number,
 	): Promise<QdrantSearchResult[]> {
-		const resp = await this.sdk.query(collection, {
-			prefetch: [
-				{ query: denseVector, using: 'dense', limit },
-				{ query: { text: queryText, model: BM25_MODEL } as unknown as number[], using: 'bm25', limit },
-			],
-			query: { rrf: { k: rrfK } } as unknown as number[],
-			limit,
-			with_payload: true,
-		});
+		const resp = await this.sdk.query(
+			collection,
+			this.buildQueryRequest({ mode: 'hybrid', denseVector, queryText, limit, rrfK, hnswEf }),
+		);
 		return this.mapScoredPoints(resp.points);
 	}
 
@@ -141,30 +192,34 @@ export class QdrantClient {
 		vector: number[],
 		limit: number,
 		scoreThreshold?: number,
+		hnswEf?: number,
 	): Promise<QdrantSearchResult[]> {
-		const resp = await this.sdk.query(collection, {
-			query: vector,
-			using: 'dense',
-			limit,
-			score_threshold: scoreThreshold ?? null,
-			with_payload: true,
-		});
+		const resp = await this.sdk.query(
+			collection,
+			this.buildQueryRequest({ mode: 'dense', denseVector: vector, limit, scoreThreshold, hnswEf }),
+		);
 		return this.mapScoredPoints(resp.points);
 	}
 
 	/**
 	 * Scroll with filter
+	 *
+	 * @param payloadFields - 只返回这些 payload 字段（默认返回全部）
+	 * @param offset - 上一页返回的 nextPageOffset（翻页用）
 	 */
 	async scroll(
 		collection: string,
 		filter: Record<string, unknown>,
 		limit: number,
+		payloadFields?: string[],
+		offset?: string | number,
 	): Promise<QdrantScrollResult> {
 		const resp = await this.sdk.scroll(collection, {
 			filter: filter as Parameters<QdrantSdk['scroll']>[1] extends infer T
 				? T extends { filter?: infer F } ? F : never : never,
 			limit,
-			with_payload: true,
+			offset,
+			with_payload: payloadFields ? { include: payloadFields } : true,
 		});
 		return {
 			points: resp.points.map(p => ({
@@ -177,6 +232,29 @@ export class QdrantClient {
 
 	// ── 内部 ────────────────────────────────────────────────
 
+	private buildQueryRequest(q: QdrantQuery): NonNullable<Parameters<QdrantSdk['query']>[1]> {
+		const params = q.hnswEf !== undefined ? { hnsw_ef: q.hnswEf } : undefined;
+		if (q.mode === 'hybrid') {
+			return {
+				prefetch: [
+					{ query: q.denseVector, using: 'dense', limit: q.limit, params },
+					{ query: { text: q.queryText, model: BM25_MODEL } as unknown as number[], using: 'bm25', limit: q.limit },
+				],
+				query: { rrf: { k: q.rrfK ?? 60 } } as unknown as number[],
+				limit: q.limit,
+				with_payload: SEARCH_PAYLOAD_SELECTOR,
+			};
+		}
+		return {
+			query: q.denseVector,
+			using: 'dense',
+			limit: q.limit,
+			score_threshold: q.scoreThreshold ?? null,
+			params,
+			with_payload: SEARCH_PAYLOAD_SELECTOR,
+		};
+	}
+
 	private mapScoredPoints(points: Array<{ id: string | number; score: number; payload?: Record<string, unknown> | null }>): QdrantSearchResult[] {
 		return points.map(p => ({
 			id: p.id,
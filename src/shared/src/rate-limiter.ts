@@ -19,12 +19,24 @@ export interface RateLimiterConfig {
 	logger?: Logger;
 }
 
+interface WindowEntry {
+	timestamp: number;
+	weight: number;
+}
+
+/** record / checkAndRecord 返回的记录句柄，用于 adjust 修正该次请求的 TPM 估算 */
+export type RateLimitHandle = Readonly<WindowEntry>;
+
 /**
  * 滑动窗口计数器（支持带权重的计数，用于 TPM 统计）
  */
 class SlidingWindow {
 	readonly windowMs: number;
-	private entries: Array<{ timestamp: number; weight: number }> = [];
+	/** 按时间顺序追加；[head, length) 为窗口内条目 */
+	private entries: WindowEntry[] = [];
+	private head = 0;
+	/** 窗口内总权重（增量维护，读取为 O(1)） */
+	private total = 0;
 
 	constructor(windowMs: number = 60_000) {
 		this.windowMs = windowMs;
@@ -32,35 +44,57 @@ class SlidingWindow {
 
 	private cleanup(now: number): void {
 		const cutoff = now - this.windowMs;
-		this.entries = this.entries.filter(e => e.timestamp > cutoff);
+		while (this.head < this.entries.length && this.entries[this.head].timestamp <= cutoff) {
+			this.total -= this.entries[this.head].weight;
+			this.head++;
+		}
+
+		// 过期条目占一半以上时压缩数组（均摊 O(1)）
+		if (this.head > 0 && this.head * 2 >= this.entries.length) {
+			this.entries = this.entries.slice(this.head);
+			this.head = 0;
+			if (this.entries.length === 0) {
+				this.total = 0;
+			}
+		}
 	}
 
 	/**
-	 * 添加带权重的条目，返回添加后的总权重
+	 * 添加带权重的条目，返回该条目（可通过 amend 修正权重）
 	 */
-	tryAdd(weight: number = 1): number {
-		const now = Date.now();
+	tryAdd(weight: number = 1, now: number = Date.now()): WindowEntry {
 		this.cleanup(now);
-		this.entries.push({ timestamp: now, weight });
-		return this.entries.reduce((sum, e) => sum + e.weight, 0);
+		const entry = { timestamp: now, weight };
+		this.entries.push(entry);
+		this.total += weight;
+		return entry;
 	}
 
 	/**
-	 * 获取窗口内总权重
+	 * 修正已有条目的权重（结果不小于 0）；条目已过期时忽略
+	 *
+	 * 未过期的条目不可能已被 cleanup 移除，因此可以直接同步修正 total
 	 */
-	getCount(): number {
-		const now = Date.now();
-		this.cleanup(now);
-		return this.entries.reduce((sum, e) => sum + e.weight, 0);
+	amend(entry: WindowEntry, delta: number, now: number = Date.now()): void {
+		if (entry.timestamp <= now - this.windowMs) return;
+		const weight = Math.max(0, entry.weight + delta);
+		this.total += weight - entry.weight;
+		entry.weight = weight;
 	}
 
 	/**
-	 * 获取窗口内最早的时间戳
+	 * 获取窗口内总权重（同时清理过期条目）
 	 */
-	getEarliestTimestamp(): number | undefined {
-		const now = Date.now();
+	getCount(now: number = Date.now()): number {
 		this.cleanup(now);
-		return this.entries[0]?.timestamp;
+		return this.total;
+	}
+
+	/**
+	 * 获取窗口内最早的时间戳（不清理，调用方应已通过 getCount 清理）
+	 */
+	peekEarliestTimestamp(): number | undefined {
+		return this.entries[this.head]?.timestamp;
 	}
 }
 
@@ -73,6 +107,8 @@ export class RateLimiter {
 	private readonly rpmLimit: number;
 	private readonly tpmLimit: number;
 	private readonly logger: Logger;
+	/** 服务端限流（429）后的退避截止时间，之前的请求一律拒绝 */
+	private blockedUntil = 0;
 
 	constructor(config: RateLimiterConfig) {
 		this.rpmLimit = config.requestsPerMinute;
@@ -86,14 +122,28 @@ export class RateLimiter {
 	 * 检查是否允许请求
 	 *
 	 * @param tokenCount - 本次请求的 token 数
-	 * @throws RateLimitError 如果超过限制
+	 * @throws RateLimitError 如果超过限制（retryAfter 为等待秒数；单次请求超过 TPM 上限时无 retryAfter）
 	 */
-	check(tokenCount: number): void {
-		const currentRpm = this.rpm.getCount();
-		const currentTpm = this.tpm.getCount();
+	check(tokenCount: number, now: number = Date.now()): void {
+		if (tokenCount > this.tpmLimit) {
+			throw new RateLimitError(
+				`Request of ${tokenCount} tokens exceeds the ${this.tpmLimit} tokens per minute limit`,
+			);
+		}
+
+		if (now < this.blockedUntil) {
+			throw new RateLimitError(
+				'Rate limit backoff: server rejected a recent request',
+				Math.ceil((this.blockedUntil - now) / 1000),
+			);
+		}
+
+		// 每个窗口只清理一次，后续读取复用同一个 now
+		const currentRpm = this.rpm.getCount(now);
+		const currentTpm = this.tpm.getCount(now);
 
 		if (currentRpm >= this.rpmLimit) {
-			const retryAfter = this.getRetryAfter(this.rpm);
+			const retryAfter = this.getRetryAfter(this.rpm, now);
 			throw new RateLimitError(
 				`Rate limit exceeded: ${currentRpm}/${this.rpmLimit} requests per minute`,
 				retryAfter,
@@ -101,7 +151,7 @@ export class RateLimiter {
 		}
 
 		if (currentTpm + tokenCount > this.tpmLimit) {
-			const retryAfter = this.getRetryAfter(this.tpm);
+			const retryAfter = this.getRetryAfter(this.tpm, now);
 			throw new RateLimitError(
 				`Rate limit exceeded: ${currentTpm + tokenCount}/${this.tpmLimit} tokens per minute`,
 				retryAfter,
@@ -117,32 +167,73 @@ export class RateLimiter {
 	 * 记录一次请求
 	 *
 	 * @param tokenCount - 本次请求的 token 数
+	 * @returns 记录句柄（传给 adjust 修正 token 数）
 	 */
-	record(tokenCount: number): void {
-		this.rpm.tryAdd(1);
-		this.tpm.tryAdd(tokenCount);
+	record(tokenCount: number, now: number = Date.now()): RateLimitHandle {
+		this.rpm.tryAdd(1, now);
+		return this.tpm.tryAdd(tokenCount, now);
 	}
 
 	/**
 	 * 检查并记录（原子操作）
 	 *
 	 * @param tokenCount - 本次请求的 token 数
+	 * @returns 记录句柄（传给 adjust 修正 token 数）
 	 * @throws RateLimitError 如果超过限制
 	 */
-	checkAndRecord(tokenCount: number): void {
-		this.check(tokenCount);
-		this.record(tokenCount);
+	checkAndRecord(tokenCount: number): RateLimitHandle {
+		const now = Date.now();
+		this.check(tokenCount, now);
+		return this.record(tokenCount, now);
+	}
+
+	/**
+	 * 按实际用量修正 TPM 记录
+	 *
+	 * checkAndRecord 时只能使用估算值；拿到 API 返回的实际 token 数后，
+	 * 直接修正该次请求的原始条目（与估算同时过期，权重不低于 0），使窗口与服务端计量保持一致
+	 *
+	 * @param handle - checkAndRecord / record 返回的句柄
+	 * @param deltaTokens - 实际 token 数 − 估算 token 数
+	 */
+	adjust(handle: RateLimitHandle, deltaTokens: number): void {
+		if (deltaTokens !== 0) {
+			this.tpm.amend(handle as WindowEntry, deltaTokens);
+		}
+	}
+
+	/**
+	 * 记录一次服务端限流（429）
+	 *
+	 * 本地窗口只是预检，服务端可能在未达到声明配额时就拒绝请求；
+	 * 此后 retryAfter 秒内的 check 都会抛出 RateLimitError，所有并发请求一起退避
+	 *
+	 * @param retryAfter - 退避时间（秒）
+	 */
+	registerFailure(retryAfter: number): void {
+		const until = Date.now() + retryAfter * 1000;
+		if (until > this.blockedUntil) {
+			this.blockedUntil = until;
+			this.logger.warn(`RateLimiter: server rate limited, backing off ${retryAfter}s`);
+		}
+	}
+
+	/**
+	 * 服务端限流退避的剩余时间（毫秒），未在退避中时为 0
+	 */
+	getBackoffRemainingMs(now: number = Date.now()): number {
+		return Math.max(0, this.blockedUntil - now);
 	}
 
 	/**
 	 * 获取距离窗口重置的等待时间（秒）
 	 */
-	private getRetryAfter(window: SlidingWindow): number {
-		const earliest = window.getEarliestTimestamp();
+	private getRetryAfter(window: SlidingWindow, now: number): number {
+		const earliest = window.peekEarliestTimestamp();
 		if (!earliest) {
 			return 0;
 		}
-		const waitMs = earliest + window.windowMs - Date.now();
+		const waitMs = earliest + window.windowMs - now;
 		return Math.max(0, Math.ceil(waitMs / 1000));
 	}
 
@@ -150,9 +241,10 @@ export class RateLimiter {
 	 * 获取当前使用情况
 	 */
 	getStats(): { rpm: number; tpm: number } {
+		const now = Date.now();
 		return {
-			rpm: this.rpm.getCount(),
-			tpm: this.tpm.getCount(),
+			rpm: this.rpm.getCount(now),
+			tpm: this.tpm.getCount(now),
 		};
 	}
 }